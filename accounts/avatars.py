@@ -0,0 +1,91 @@
+import hashlib
+import logging
+import threading
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+# Uploaded avatars are re-encoded into square variants sized for where they
+# are shown (nav bar and lists, admin detail, profile page; 2x for high-DPI
+# screens). Re-encoding drops EXIF, GPS and colour-profile metadata, and
+# names are content hashes so variants can be cached forever. The original
+# upload is deleted once its variants exist. Processing runs on a thread
+# started after the upload commits; `manage.py process_avatars` catches
+# anything a restart interrupted.
+
+SIZES = {'small': 64, 'medium': 128, 'large': 256}
+
+
+def image_format():
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+def render_variants(source):
+    image = ImageOps.exif_transpose(Image.open(source))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    fmt, ext = image_format()
+    if fmt == 'JPEG' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    variants = {}
+    for size, pixels in SIZES.items():
+        variant = ImageOps.fit(image, (pixels, pixels), Image.Resampling.LANCZOS)
+        variant.info = {}
+        buffer = BytesIO()
+        variant.save(buffer, fmt, quality=85)
+        variants[size] = (buffer.getvalue(), ext)
+    return variants
+
+
+def files(profile):
+    names = set((profile.avatar_variants or {}).values())
+    if profile.avatar_file:
+        names.add(profile.avatar_file.name)
+    return names
+
+
+def delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def process(profile_id, original_name):
+    # Returns False when the profile has moved on to another upload (or none)
+    # while this one was being processed; its variants are discarded.
+    from .models import UserProfile
+    with default_storage.open(original_name) as source:
+        rendered = render_variants(source)
+
+    user_id = UserProfile.objects.values_list('user_id', flat=True).get(id=profile_id)
+    variants = {}
+    for size, (data, ext) in rendered.items():
+        name = f'avatars/{user_id}/{hashlib.sha256(data).hexdigest()[:16]}-{SIZES[size]}.{ext}'
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(data))
+        variants[size] = name
+
+    updated = UserProfile.objects.filter(id=profile_id, avatar_file=original_name).update(
+        avatar_file=variants['large'], avatar_variants=variants,
+    )
+    if not updated:
+        current = UserProfile.objects.filter(id=profile_id).first()
+        delete_files(set(variants.values()) - (files(current) if current else set()))
+        return False
+    default_storage.delete(original_name)
+    return True
+
+
+def process_in_background(profile_id, original_name):
+    def run():
+        from django.db import connection
+        try:
+            process(profile_id, original_name)
+        except Exception as e:
+            logging.error(f"Avatar processing failed for profile {profile_id}: {e}")
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Case, Q, Value, When
+
+UserModel = get_user_model()
+
+
+class ProfileBackend(ModelBackend):
+    # Loads the user's profile in the same query as the user, so templates and
+    # is_admin() reading request.user.profile don't cost a query per request.
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        # Accepts a username or an email address in one query, served by the
+        # username unique index and the UPPER(email) index. An email match
+        # wins, then the oldest account.
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = UserModel._default_manager.filter(
+            Q(email__iexact=username) | Q(username=username)
+        ).order_by(Case(When(email__iexact=username, then=Value(0)), default=Value(1)), 'id').first()
+        if user is None:
+            # Run the hasher anyway so unknown names take as long as wrong passwords.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
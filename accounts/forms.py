@@ -42,13 +42,7 @@ class LoginForm(forms.Form):
         
         if username_or_email and password:
             from django.contrib.auth import authenticate
-            user = User.objects.filter(email=username_or_email).first()
-            if user:
-                username = user.username
-            else:
-                username = username_or_email
-            
-            self.user_cache = authenticate(self.request, username=username, password=password)
+            self.user_cache = authenticate(self.request, username=username_or_email, password=password)
             if self.user_cache is None:
                 raise forms.ValidationError('Invalid username/email or password.')
             elif not self.user_cache.is_active:
@@ -125,7 +119,7 @@ class ForgotPasswordForm(forms.Form):
     
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if not User.objects.filter(email=email).exists():
+        if not User.objects.filter(email__iexact=email).exists():
             raise forms.ValidationError('No account found with this email address.')
         return email
 
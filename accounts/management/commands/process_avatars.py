@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from accounts import avatars
+from accounts.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Resize uploaded avatars that have no variants yet (older uploads, or ones a restart interrupted)'
+
+    def handle(self, *args, **options):
+        pending = UserProfile.objects.filter(avatar_variants__isnull=True).exclude(avatar_file='').exclude(avatar_file__isnull=True)
+        processed = failed = 0
+        for profile_id, name in pending.values_list('id', 'avatar_file').iterator():
+            try:
+                processed += avatars.process(profile_id, name)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Profile {profile_id} ({name}): {e}")
+        self.stdout.write(f"Processed {processed} avatars, {failed} failed")
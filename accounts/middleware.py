@@ -0,0 +1,15 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+PROFILE_BACKEND = 'accounts.backends.ProfileBackend'
+
+
+def upgrade_session_backend(get_response):
+    # Sessions created before ProfileBackend record ModelBackend, which is no
+    # longer in AUTHENTICATION_BACKENDS; repoint them instead of logging
+    # everyone out. Must run before AuthenticationMiddleware.
+    def middleware(request):
+        if request.session.get(BACKEND_SESSION_KEY) == MODEL_BACKEND:
+            request.session[BACKEND_SESSION_KEY] = PROFILE_BACKEND
+        return get_response(request)
+    return middleware
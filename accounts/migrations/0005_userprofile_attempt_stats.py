@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:07
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_attempt_stats(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    QuizAttempt = apps.get_model('quiz', 'QuizAttempt')
+    completed = Q(status='completed')
+    totals = QuizAttempt.objects.values('user_id').annotate(
+        completed_quizzes=Count('id', filter=completed),
+        in_progress_quizzes=Count('id', filter=Q(status='in_progress')),
+        total_score=Sum('score', filter=completed, default=0),
+        total_questions_answered=Sum('total_questions', filter=completed, default=0),
+    )
+    for row in totals:
+        UserProfile.objects.filter(user_id=row.pop('user_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_userprofile_current_streak_and_more'),
+        ('quiz', '0006_quizattempt_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='completed_quizzes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='in_progress_quizzes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='total_questions_answered',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='total_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_attempt_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_userprofile_attempt_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='total_points',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+    ]
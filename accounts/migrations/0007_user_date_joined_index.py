@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_userprofile_total_points_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    # auth_user belongs to django.contrib.auth, so the index for the admin
+    # users listing's (date_joined, id) keyset is created directly.
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_date_joined_id_idx ON auth_user (date_joined, id)',
+            'DROP INDEX IF EXISTS auth_user_date_joined_id_idx',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:02
+
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    # Matches the UPPER(email) = UPPER(%s) that email__iexact compiles to on
+    # PostgreSQL. Built concurrently there so a large auth_user stays writable.
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(
+        f'CREATE INDEX {concurrently}IF NOT EXISTS auth_user_email_upper_idx ON auth_user (UPPER(email))'
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS auth_user_email_upper_idx')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0007_user_date_joined_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,10 +1,16 @@
+import os
+import secrets
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 from django.utils import timezone
+from .avatars import SIZES as AVATAR_SIZES
 
 
 def avatar_upload_path(instance, filename):
-    return f'avatars/{instance.user.id}/{filename}'
+    # Unique per upload, so a resize still running for a replaced upload can
+    # never match the new one (see accounts.avatars.process).
+    return f'avatars/{instance.user.id}/originals/{secrets.token_hex(8)}{os.path.splitext(filename)[1].lower()}'
 
 
 class UserProfile(models.Model):
@@ -18,6 +24,7 @@ class UserProfile(models.Model):
     is_quiz_admin = models.BooleanField(default=False)
     avatar = models.URLField(max_length=500, blank=True, null=True)
     avatar_file = models.ImageField(upload_to=avatar_upload_path, blank=True, null=True)
+    avatar_variants = models.JSONField(null=True, blank=True)
     bio = models.TextField(max_length=500, blank=True)
     preferred_difficulty = models.CharField(max_length=20, choices=[
         ('easy', 'Easy'),
@@ -42,16 +49,34 @@ class UserProfile(models.Model):
     current_streak = models.IntegerField(default=0)
     longest_streak = models.IntegerField(default=0)
     last_quiz_date = models.DateField(null=True, blank=True)
-    total_points = models.IntegerField(default=0)
+    total_points = models.IntegerField(default=0, db_index=True)
+    completed_quizzes = models.IntegerField(default=0)
+    in_progress_quizzes = models.IntegerField(default=0)
+    total_score = models.IntegerField(default=0)
+    total_questions_answered = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.user.username}'s Profile"
     
-    def get_avatar_url(self):
+    def average_score(self):
+        if not self.total_questions_answered:
+            return 0
+        return round(self.total_score / self.total_questions_answered * 100)
+    
+    def get_avatar_url(self, size='medium'):
+        # Until the background resize finishes an upload serves as-is.
+        if self.avatar_variants:
+            return default_storage.url(self.avatar_variants[size])
         if self.avatar_file:
             return self.avatar_file.url
         if self.avatar:
             return self.avatar
-        return f"https://ui-avatars.com/api/?name={self.user.username}&background=3b82f6&color=fff&size=128"
+        return f"https://ui-avatars.com/api/?name={self.user.username}&background=3b82f6&color=fff&size={AVATAR_SIZES[size]}"
+    
+    def get_small_avatar_url(self):
+        return self.get_avatar_url('small')
+    
+    def get_large_avatar_url(self):
+        return self.get_avatar_url('large')
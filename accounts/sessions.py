@@ -0,0 +1,34 @@
+from django.contrib.sessions.backends import db, signed_cookies
+
+# Signed-cookie session engine that still honours sessions stored in the
+# database. A cookie that isn't signed session data is looked up as a
+# django_session key once; if it is live, its data is re-issued as a signed
+# cookie on that response, so switching SESSION_STORE to signed_cookies does
+# not log anyone out. The row is deleted once the cookie is issued, or on
+# logout, so the old key cannot outlive the session.
+
+
+class SessionStore(signed_cookies.SessionStore):
+    legacy_key = None
+
+    def load(self):
+        if self.session_key and ':' not in self.session_key:
+            data = db.SessionStore(self.session_key).load()
+            if data:
+                self.legacy_key = self.session_key
+                self.modified = True
+                return data
+        return super().load()
+
+    def save(self, must_create=False):
+        super().save(must_create)
+        self._delete_legacy()
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        self._delete_legacy()
+
+    def _delete_legacy(self):
+        if self.legacy_key:
+            db.SessionStore(self.legacy_key).delete()
+            self.legacy_key = None
@@ -1,3 +1,108 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from . import avatars
+from .models import UserProfile
 
-# Create your tests here.
+
+class PasswordResetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', email='student@example.com', password='pass12345')
+
+    def request_link(self):
+        response = self.client.post(reverse('accounts:forgot_password'), {'email': 'student@example.com'})
+        return response['Location']
+
+    def test_link_is_checked_with_one_query(self):
+        url = self.request_link()
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, 'student@example.com')
+
+    def test_link_works_once(self):
+        url = self.request_link()
+        form = {'new_password1': 'newpass123', 'new_password2': 'newpass123'}
+        self.assertRedirects(self.client.post(url, form), reverse('accounts:login'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('newpass123'))
+        self.assertRedirects(self.client.get(url), reverse('accounts:forgot_password'))
+
+    def test_tampered_link_is_rejected(self):
+        url = self.request_link()
+        self.assertRedirects(self.client.get(url[:-3] + 'abc/'), reverse('accounts:forgot_password'))
+
+
+class UsernameOrEmailLoginTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', email='Student@Example.com', password='pass12345')
+
+    def test_login_accepts_username_or_email_in_one_query(self):
+        for identifier in ('student', 'student@example.com'):
+            with self.assertNumQueries(1):
+                user = authenticate(username=identifier, password='pass12345')
+            self.assertEqual(user, self.user)
+        self.assertIsNone(authenticate(username='student@example.com', password='wrong'))
+
+    def test_login_form_signs_in_by_email(self):
+        response = self.client.post(reverse('accounts:login'), {
+            'username_or_email': 'STUDENT@example.com', 'password': 'pass12345',
+        })
+        self.assertRedirects(response, reverse('quiz:dashboard'), fetch_redirect_response=False)
+        self.assertEqual(int(self.client.session['_auth_user_id']), self.user.id)
+
+
+class AvatarPipelineTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.user = User.objects.create_user(username='student', email='student@example.com', password='pass12345')
+        self.profile = UserProfile.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def upload(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera Maker'
+        buffer = BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, 'JPEG', exif=exif)
+        form = {
+            'username': 'student', 'email': 'student@example.com',
+            'preferred_difficulty': 'medium', 'questions_per_quiz': 10,
+            'avatar_file': SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg'),
+        }
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse('accounts:profile'), form)
+        self.assertEqual(len(callbacks), 1)
+        self.profile.refresh_from_db()
+        return self.profile.avatar_file.name
+
+    def test_upload_is_resized_into_stripped_hashed_variants(self):
+        original = self.upload()
+        self.assertTrue(avatars.process(self.profile.id, original))
+        self.profile.refresh_from_db()
+        self.assertFalse(default_storage.exists(original))
+        for size, pixels in avatars.SIZES.items():
+            name = self.profile.avatar_variants[size]
+            self.assertRegex(name, rf'^avatars/{self.user.id}/[0-9a-f]{{16}}-{pixels}\.(webp|jpg)$')
+            with default_storage.open(name) as f, Image.open(f) as image:
+                self.assertEqual(image.size, (pixels, pixels))
+                self.assertFalse(image.getexif())
+        self.assertTrue(self.profile.get_small_avatar_url().endswith(self.profile.avatar_variants['small']))
+
+    def test_superseded_upload_is_discarded(self):
+        first = self.upload()
+        with default_storage.open(first) as f:
+            first_bytes = f.read()
+        second = self.upload()
+        # The first upload's resize was already under way when it was replaced.
+        default_storage.save(first, SimpleUploadedFile('photo.jpg', first_bytes))
+        self.assertFalse(avatars.process(self.profile.id, first))
+        self.assertTrue(avatars.process(self.profile.id, second))
+        self.assertEqual(len(default_storage.listdir(f'avatars/{self.user.id}')[1]), len(avatars.SIZES))
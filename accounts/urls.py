@@ -10,5 +10,5 @@ urlpatterns = [
     path('profile/', views.profile_view, name='profile'),
     path('profile/remove-avatar/', views.remove_avatar, name='remove_avatar'),
     path('forgot-password/', views.forgot_password_view, name='forgot_password'),
-    path('reset-password/<str:token>/', views.reset_password_view, name='reset_password'),
+    path('reset-password/<str:uidb64>/<str:token>/', views.reset_password_view, name='reset_password'),
 ]
@@ -1,14 +1,16 @@
-import os
-import secrets
+from functools import partial
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
 from django.contrib import messages
+from django.db import transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from .forms import SignUpForm, LoginForm, UserForm, ProfileForm, ForgotPasswordForm, ResetPasswordForm
 from .models import UserProfile
-
-password_reset_tokens = {}
+from . import avatars
 
 
 def signup_view(request):
@@ -62,17 +64,19 @@ def profile_view(request):
     profile, created = UserProfile.objects.get_or_create(user=request.user)
     
     if request.method == 'POST':
+        old_avatar_files = avatars.files(profile)
         user_form = UserForm(request.POST, instance=request.user)
         profile_form = ProfileForm(request.POST, request.FILES, instance=profile)
         
         if user_form.is_valid() and profile_form.is_valid():
             user_form.save()
             if 'avatar_file' in request.FILES:
-                if profile.avatar_file:
-                    old_path = profile.avatar_file.path
-                    if os.path.exists(old_path):
-                        os.remove(old_path)
+                avatars.delete_files(old_avatar_files)
+                profile.avatar_variants = None
             profile_form.save()
+            if 'avatar_file' in request.FILES:
+                # Resized off the request; the upload is served as-is until then.
+                transaction.on_commit(partial(avatars.process_in_background, profile.id, profile.avatar_file.name))
             messages.success(request, 'Profile updated successfully!')
             return redirect('accounts:profile')
     else:
@@ -90,10 +94,9 @@ def profile_view(request):
 def remove_avatar(request):
     if request.method == 'POST':
         profile = request.user.profile
-        if profile.avatar_file:
-            if profile.avatar_file.path and os.path.exists(profile.avatar_file.path):
-                os.remove(profile.avatar_file.path)
-            profile.avatar_file = None
+        avatars.delete_files(avatars.files(profile))
+        profile.avatar_file = None
+        profile.avatar_variants = None
         profile.avatar = None
         profile.save()
         messages.success(request, 'Avatar removed successfully!')
@@ -107,29 +110,30 @@ def forgot_password_view(request):
     if request.method == 'POST':
         form = ForgotPasswordForm(request.POST)
         if form.is_valid():
-            email = form.cleaned_data['email']
-            token = secrets.token_urlsafe(32)
-            password_reset_tokens[token] = email
-            return redirect('accounts:reset_password', token=token)
+            user = User.objects.filter(email__iexact=form.cleaned_data['email']).order_by('id').first()
+            # Stateless HMAC token: valid on every worker, expires after
+            # PASSWORD_RESET_TIMEOUT and stops working once the password changes.
+            return redirect(
+                'accounts:reset_password',
+                uidb64=urlsafe_base64_encode(force_bytes(user.pk)),
+                token=default_token_generator.make_token(user),
+            )
     else:
         form = ForgotPasswordForm()
     
     return render(request, 'accounts/forgot_password.html', {'form': form})
 
 
-def reset_password_view(request, token):
+def reset_password_view(request, uidb64, token):
     if request.user.is_authenticated:
         return redirect('quiz:dashboard')
     
-    email = password_reset_tokens.get(token)
-    if not email:
-        messages.error(request, 'Invalid or expired reset link.')
-        return redirect('accounts:forgot_password')
-    
     try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
-        messages.error(request, 'User not found.')
+        user = User.objects.get(pk=urlsafe_base64_decode(uidb64).decode())
+    except (ValueError, User.DoesNotExist):
+        user = None
+    if user is None or not default_token_generator.check_token(user, token):
+        messages.error(request, 'Invalid or expired reset link.')
         return redirect('accounts:forgot_password')
     
     if request.method == 'POST':
@@ -137,10 +141,9 @@ def reset_password_view(request, token):
         if form.is_valid():
             user.set_password(form.cleaned_data['new_password1'])
             user.save()
-            del password_reset_tokens[token]
             messages.success(request, 'Password reset successfully! Please log in with your new password.')
             return redirect('accounts:login')
     else:
         form = ResetPasswordForm()
     
-    return render(request, 'accounts/reset_password.html', {'form': form, 'email': email})
+    return render(request, 'accounts/reset_password.html', {'form': form, 'email': user.email})
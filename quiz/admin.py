@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Subcategory, Quiz, Question, QuizAttempt, UserAnswer
+from .models import Category, Subcategory, Quiz, Question, PooledQuestion, QuizAttempt, UserAnswer
 
 
 @admin.register(Category)
@@ -41,6 +41,17 @@ class QuestionAdmin(admin.ModelAdmin):
     question_text_short.short_description = 'Question'
 
 
+@admin.register(PooledQuestion)
+class PooledQuestionAdmin(admin.ModelAdmin):
+    list_display = ['subcategory', 'difficulty', 'question_text_short', 'created_at']
+    list_filter = ['difficulty', 'subcategory__category']
+    search_fields = ['question_text', 'subcategory__name']
+    
+    def question_text_short(self, obj):
+        return obj.question_text[:50] + '...' if len(obj.question_text) > 50 else obj.question_text
+    question_text_short.short_description = 'Question'
+
+
 @admin.register(QuizAttempt)
 class QuizAttemptAdmin(admin.ModelAdmin):
     list_display = ['user', 'quiz', 'score', 'total_questions', 'status', 'started_at', 'completed_at']
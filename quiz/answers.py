@@ -0,0 +1,72 @@
+from django.db import connection
+from django.db.models import F, Q
+from .models import Question, QuizAttempt, UserAnswer
+from .scoring import answer_cutoff
+
+ANSWER_CHOICES = ('A', 'B', 'C', 'D')
+
+# One statement records a batch of answers: the join against the attempt
+# enforces ownership, in-progress status and the server-side deadline, the join against the quiz's
+# questions rejects foreign question ids and computes correctness, and
+# ON CONFLICT turns re-answers into updates. VALUES columns are named
+# column1, column2 on both PostgreSQL and SQLite.
+UPSERT_SQL = """
+INSERT INTO {answer_table} (attempt_id, question_id, selected_answer, is_correct)
+SELECT a.id, q.id, s.column2, q.correct_answer = s.column2
+FROM {attempt_table} a
+JOIN {question_table} q ON q.quiz_id = a.quiz_id
+JOIN (VALUES {values}) s ON s.column1 = q.id
+WHERE a.id = %s AND a.user_id = %s AND a.status = 'in_progress'
+  AND (a.expires_at IS NULL OR a.expires_at > %s)
+ON CONFLICT (attempt_id, question_id) DO UPDATE
+SET selected_answer = excluded.selected_answer, is_correct = excluded.is_correct
+"""
+
+
+def clean_answers(answers):
+    cleaned = {}
+    for question_id, selected in (answers or {}).items():
+        try:
+            question_id = int(question_id)
+        except (TypeError, ValueError):
+            continue
+        if isinstance(selected, str) and selected.upper() in ANSWER_CHOICES:
+            cleaned[question_id] = selected.upper()
+    return cleaned
+
+
+def record_answers(attempt_id, user_id, answers):
+    # Returns the number of answers written; answers for questions outside
+    # the attempt's quiz, or for attempts that are not the user's in-progress,
+    # unexpired attempt, are silently skipped.
+    answers = clean_answers(answers)
+    if not answers:
+        return 0
+
+    sql = UPSERT_SQL.format(
+        values=', '.join(['(%s, %s)'] * len(answers)),
+        answer_table=UserAnswer._meta.db_table,
+        attempt_table=QuizAttempt._meta.db_table,
+        question_table=Question._meta.db_table,
+    )
+    params = [value for item in answers.items() for value in item] + [
+        attempt_id, user_id, connection.ops.adapt_datetimefield_value(answer_cutoff()),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def update_progress(attempt_id, user_id, current_question=None):
+    # Conditional UPDATE: a no-op once the attempt has been submitted or has
+    # run out of time. Every write bumps the version so a concurrent submit
+    # can detect it.
+    fields = {'version': F('version') + 1}
+    if current_question is not None:
+        fields['current_question'] = current_question
+    return QuizAttempt.objects.filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=answer_cutoff()),
+        id=attempt_id,
+        user_id=user_id,
+        status='in_progress',
+    ).update(**fields)
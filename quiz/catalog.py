@@ -0,0 +1,109 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .models import Category
+
+# The Category -> Subcategory tree, loaded with one LEFT JOIN query and kept
+# in two layers: a per-process copy and a shared-cache copy keyed by a
+# catalog version. post_save/post_delete on either model bump the version
+# (see quiz.signals), which drops this process's copy immediately and other
+# processes' copies within CATALOG_LOCAL_TTL seconds. That relies on the
+# default cache being shared (CACHE_URL); as a backstop against missed
+# invalidations a process reloads from the database once its copy is
+# CATALOG_LOCAL_MAX_AGE seconds old.
+
+VERSION_KEY = 'catalog:version'
+
+_local = {'version': None, 'tree': None, 'checked_at': 0.0, 'loaded_at': 0.0}
+_lock = threading.Lock()
+
+
+def local_ttl():
+    return getattr(settings, 'CATALOG_LOCAL_TTL', 5)
+
+
+def local_max_age():
+    return getattr(settings, 'CATALOG_LOCAL_MAX_AGE', 300)
+
+
+def load():
+    rows = Category.objects.order_by('id', 'subcategories__id').values(
+        'id', 'name', 'description', 'icon',
+        'subcategories__id', 'subcategories__name', 'subcategories__description',
+    )
+    categories = {}
+    for row in rows:
+        category = categories.get(row['id'])
+        if category is None:
+            category = categories[row['id']] = {
+                'id': row['id'],
+                'name': row['name'],
+                'description': row['description'],
+                'icon': row['icon'],
+                'subcategories': [],
+            }
+        if row['subcategories__id'] is not None:
+            category['subcategories'].append({
+                'id': row['subcategories__id'],
+                'name': row['subcategories__name'],
+                'description': row['subcategories__description'],
+                'category_id': row['id'],
+            })
+    for category in categories.values():
+        category['subcategory_count'] = len(category['subcategories'])
+    return list(categories.values())
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def invalidate():
+    cache.set(VERSION_KEY, _new_version(), None)
+    with _lock:
+        _local.update(version=None, tree=None, checked_at=0.0, loaded_at=0.0)
+
+
+def categories():
+    now = time.monotonic()
+    with _lock:
+        expired = _local['tree'] is not None and now - _local['loaded_at'] >= local_max_age()
+        if _local['tree'] is not None and not expired and now - _local['checked_at'] < local_ttl():
+            return _local['tree']
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = _new_version()
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+
+    with _lock:
+        if _local['version'] == version and not expired:
+            _local['checked_at'] = now
+            return _local['tree']
+
+    key = f'catalog:tree:{version}'
+    tree = None if expired else cache.get(key)
+    if tree is None:
+        tree = load()
+        # Superseded versions are never read again; let them age out.
+        cache.set(key, tree, 86400)
+    with _lock:
+        _local.update(version=version, tree=tree, checked_at=now, loaded_at=now)
+    return tree
+
+
+def category(category_id):
+    for entry in categories():
+        if entry['id'] == category_id:
+            return entry
+    return None
+
+
+def subcategory_choices():
+    return [
+        (sub['id'], f"{cat['name']} - {sub['name']}")
+        for cat in categories()
+        for sub in cat['subcategories']
+    ]
@@ -1,5 +1,6 @@
 from django import forms
 from .models import Category, Subcategory
+from . import catalog
 
 
 class QuizSettingsForm(forms.Form):
@@ -22,11 +23,7 @@ class QuizSettingsForm(forms.Form):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        subcategories = []
-        for cat in Category.objects.all():
-            for sub in cat.subcategories.all():
-                subcategories.append((sub.id, f"{cat.name} - {sub.name}"))
-        self.fields['subcategory_id'].choices = subcategories
+        self.fields['subcategory_id'].choices = catalog.subcategory_choices()
         
         for field in self.fields.values():
             field.widget.attrs['class'] = 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition'
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import math
+import random
+from django.conf import settings
+from django.core.cache import caches
+
+# Content-addressed cache for generator responses. Entries are keyed by a
+# hash of the model, prompt and request config, so any change to the prompt
+# template naturally misses. Eviction (TTL and LRU size bound) is delegated
+# to the configured cache backend.
+
+LETTERS = ['A', 'B', 'C', 'D']
+
+
+def cache_enabled():
+    return getattr(settings, 'QUIZ_GENERATION_CACHE_ENABLED', True)
+
+
+def _cache():
+    return caches[getattr(settings, 'QUIZ_GENERATION_CACHE_ALIAS', 'quiz_generation')]
+
+
+def oversampled(num_questions):
+    # Generating a few extra questions per miss lets later hits return a
+    # different subset, so repeat users do not get identical quizzes.
+    factor = getattr(settings, 'QUIZ_GENERATION_CACHE_OVERSAMPLE', 1.0) if cache_enabled() else 1.0
+    return max(num_questions, math.ceil(num_questions * factor))
+
+
+def cache_key(model, prompt, config):
+    payload = json.dumps([model, prompt, config], sort_keys=True)
+    return 'quiz-generation:' + hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _count(name):
+    cache = _cache()
+    key = f'quiz-generation-stats:{name}'
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def lookup(key):
+    if not cache_enabled():
+        return None
+    questions = _cache().get(key)
+    _count('hits' if questions is not None else 'misses')
+    return questions
+
+
+def store(key, questions):
+    if cache_enabled() and questions:
+        _cache().set(key, questions, getattr(settings, 'QUIZ_GENERATION_CACHE_TTL', 86400))
+
+
+def stats():
+    cache = _cache()
+    hits = cache.get('quiz-generation-stats:hits', 0)
+    misses = cache.get('quiz-generation-stats:misses', 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+def shuffle_options(question):
+    correct = str(question.get('correct_answer', '')).upper()
+    if correct not in LETTERS:
+        return dict(question)
+
+    options = [question.get(f'option_{letter.lower()}') for letter in LETTERS]
+    order = random.sample(range(len(LETTERS)), len(LETTERS))
+    shuffled = dict(question)
+    for position, source in enumerate(order):
+        shuffled[f'option_{LETTERS[position].lower()}'] = options[source]
+        if LETTERS[source] == correct:
+            shuffled['correct_answer'] = LETTERS[position]
+    return shuffled
+
+
+def sample(questions, num_questions, reshuffle=False):
+    picked = random.sample(questions, min(num_questions, len(questions)))
+    if reshuffle:
+        picked = [shuffle_options(q) for q in picked]
+    return picked
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import random
+import urllib.request
+from functools import lru_cache
+from django.conf import settings
+from django.utils.module_loading import import_string
+from . import resilience
+
+# IMPORTANT: Using Gemini API for quiz generation
+# Note that the newest Gemini model series is "gemini-2.5-flash"
+# do not change this unless explicitly requested by the user
+GEMINI_MODEL = "gemini-2.5-flash"
+
+RESPONSE_CONFIG = {"response_mime_type": "application/json"}
+
+
+class BaseGenerator:
+    # A backend turns a prompt into the JSON text of a {"questions": [...]}
+    # document. The structured arguments are passed alongside the prompt for
+    # backends that do not talk to a language model.
+    model_name = ''
+
+    def is_available(self):
+        return True
+
+    def generate_content(self, prompt, subcategory_name, difficulty, num_questions):
+        raise NotImplementedError
+
+    def stream_content(self, prompt, subcategory_name, difficulty, num_questions):
+        yield self.generate_content(prompt, subcategory_name, difficulty, num_questions)
+
+
+class GeminiGenerator(BaseGenerator):
+    model_name = GEMINI_MODEL
+
+    def __init__(self):
+        self.client = None
+        api_key = os.environ.get("GEMINI_API_KEY")
+        if api_key:
+            from google import genai
+            from google.genai import types
+            deadline_ms = int(resilience.deadline_seconds() * 1000)
+            self.client = genai.Client(api_key=api_key, http_options=types.HttpOptions(timeout=deadline_ms))
+
+    def is_available(self):
+        return self.client is not None
+
+    def _config(self):
+        from google.genai import types
+        return types.GenerateContentConfig(**RESPONSE_CONFIG)
+
+    def generate_content(self, prompt, subcategory_name, difficulty, num_questions):
+        response = self.client.models.generate_content(
+            model=self.model_name,
+            contents=prompt,
+            config=self._config(),
+        )
+        return response.text
+
+    def stream_content(self, prompt, subcategory_name, difficulty, num_questions):
+        stream = self.client.models.generate_content_stream(
+            model=self.model_name,
+            contents=prompt,
+            config=self._config(),
+        )
+        for chunk in stream:
+            yield chunk.text or ''
+
+
+class LocalCorpusGenerator(BaseGenerator):
+    # Deterministic questions for offline development and load tests. Draws
+    # from QUIZ_LOCAL_CORPUS_PATH when set, a JSON file shaped like
+    # {"<subcategory>": {"<difficulty>": [question, ...]}}, and otherwise
+    # builds templated questions. The same prompt always yields the same
+    # questions.
+    model_name = 'local-corpus'
+
+    def __init__(self):
+        self.corpus = {}
+        path = getattr(settings, 'QUIZ_LOCAL_CORPUS_PATH', None)
+        if path:
+            with open(path) as f:
+                self.corpus = json.load(f)
+
+    def questions(self, prompt, subcategory_name, difficulty, num_questions):
+        seed = hashlib.sha256(prompt.encode()).hexdigest()
+        rng = random.Random(seed)
+        available = self.corpus.get(subcategory_name, {}).get(difficulty, [])
+        if available:
+            return rng.sample(available, min(num_questions, len(available)))
+
+        questions = []
+        for i in range(num_questions):
+            correct = rng.choice('ABCD')
+            questions.append({
+                "question": f"{subcategory_name} ({difficulty}) practice question {seed[:8]}-{i + 1}",
+                "option_a": "Option A",
+                "option_b": "Option B",
+                "option_c": "Option C",
+                "option_d": "Option D",
+                "correct_answer": correct,
+                "explanation": f"Option {correct} is the correct answer in the local corpus.",
+            })
+        return questions
+
+    def generate_content(self, prompt, subcategory_name, difficulty, num_questions):
+        return json.dumps({"questions": self.questions(prompt, subcategory_name, difficulty, num_questions)})
+
+
+class HttpStubGenerator(BaseGenerator):
+    # Talks to `manage.py run_generator_stub`, which answers from the local
+    # corpus after a configurable delay and fails a configurable share of
+    # requests.
+    model_name = 'http-stub'
+
+    def generate_content(self, prompt, subcategory_name, difficulty, num_questions):
+        body = json.dumps({
+            "prompt": prompt,
+            "subcategory_name": subcategory_name,
+            "difficulty": difficulty,
+            "num_questions": num_questions,
+        }).encode()
+        request = urllib.request.Request(
+            settings.QUIZ_GENERATOR_STUB_URL,
+            data=body,
+            headers={"Content-Type": "application/json"},
+        )
+        # Give up with guarded_call so an abandoned request frees its
+        # executor slot at the deadline.
+        with urllib.request.urlopen(request, timeout=resilience.deadline_seconds()) as response:
+            return response.read().decode()
+
+
+@lru_cache(maxsize=None)
+def _load_generator(path):
+    return import_string(path)()
+
+
+def get_generator():
+    return _load_generator(getattr(settings, 'QUIZ_GENERATOR_BACKEND', 'quiz.generator_backends.GeminiGenerator'))
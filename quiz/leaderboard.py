@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Subquery, Window
+from django.db.models.functions import Coalesce, Rank
+from . import percentiles, rank_index
+
+# Top-N and per-user rank over UserProfile.total_points. Both are single
+# indexed queries; results are cached for LEADERBOARD_CACHE_TTL seconds under
+# a generation number that completing an attempt bumps, so a submit shows up
+# on the next read in this process and within the TTL everywhere else.
+
+GENERATION_KEY = 'leaderboard:generation'
+
+
+def cache_ttl():
+    return getattr(settings, 'LEADERBOARD_CACHE_TTL', 30)
+
+
+def size():
+    return getattr(settings, 'LEADERBOARD_SIZE', 10)
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 0, None)
+
+
+def invalidate():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def top_players(limit=None):
+    from accounts.models import UserProfile
+    limit = limit or size()
+    # RANK() is only exact over everyone at or above the Nth score, so the
+    # window runs over that index range instead of the whole table.
+    nth = UserProfile.objects.filter(total_points__gt=0).order_by('-total_points').values('total_points')
+    cutoff = Coalesce(Subquery(nth[limit - 1:limit]), 1)
+    profiles = UserProfile.objects.filter(total_points__gte=cutoff).select_related('user').annotate(
+        rank=Window(Rank(), order_by=F('total_points').desc()),
+    ).order_by('-total_points', 'user_id')[:limit]
+    return [{
+        'rank': p.rank,
+        'user_id': p.user_id,
+        'username': p.user.username,
+        'quizzes': p.completed_quizzes,
+        'score_pct': p.average_score(),
+        'total_points': p.total_points,
+    } for p in profiles]
+
+
+def rank_for_points(points):
+    # Competition ranking, matching RANK(): one more than the number of
+    # players strictly ahead.
+    from accounts.models import UserProfile
+    if points <= 0:
+        return None
+    return UserProfile.objects.filter(total_points__gt=points).count() + 1
+
+
+def snapshot():
+    key = f'leaderboard:{_generation()}:top:{size()}'
+    players = cache.get(key)
+    if players is None:
+        players = top_players()
+        cache.set(key, players, cache_ttl())
+    return players
+
+
+def user_rank(profile, players=None):
+    players = snapshot() if players is None else players
+    for player in players:
+        if player['user_id'] == profile.user_id:
+            return player['rank']
+    if profile.total_points <= 0:
+        return None
+    if rank_index.enabled():
+        return rank_index.index.rank(profile.total_points)
+
+    key = f'leaderboard:{_generation()}:rank:{profile.total_points}'
+    rank = cache.get(key)
+    if rank is None:
+        rank = rank_for_points(profile.total_points)
+        cache.set(key, rank, cache_ttl())
+    return rank
+
+
+def user_standing(profile, players=None):
+    # Exact rank inside the top N, an approximate percentile outside it.
+    players = snapshot() if players is None else players
+    for player in players:
+        if player['user_id'] == profile.user_id:
+            return f"#{player['rank']}"
+    if profile.total_points <= 0:
+        return 'N/A'
+    if percentiles.enabled():
+        return f"Top {percentiles.top_percent(profile.total_points)}%"
+    return f"#{user_rank(profile, players)}"
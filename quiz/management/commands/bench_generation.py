@@ -0,0 +1,45 @@
+import time
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from quiz import openai_service
+from quiz.generator_backends import get_generator
+
+
+class Command(BaseCommand):
+    help = 'Measure wall-clock question generation latency against num_questions, single prompt vs chunked'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 15, 20])
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--subcategory-name', default='Physics')
+        parser.add_argument('--difficulty', default='medium')
+        parser.add_argument('--chunk-size', type=int, default=5)
+        parser.add_argument('--concurrency', type=int, default=4)
+
+    def handle(self, *args, **options):
+        if not get_generator().is_available():
+            self.stderr.write('Question generator not configured; timings reflect the fallback generator only.')
+
+        modes = [
+            ('single', {'QUIZ_GENERATION_CHUNK_SIZE': 0}),
+            ('chunked', {
+                'QUIZ_GENERATION_CHUNK_SIZE': options['chunk_size'],
+                'QUIZ_GENERATION_MAX_CONCURRENCY': options['concurrency'],
+            }),
+        ]
+        self.stdout.write(f"{'questions':>10}" + ''.join(f"{label + ' ms':>14}" for label, _ in modes))
+        for size in options['sizes']:
+            row = f"{size:>10}"
+            for label, overrides in modes:
+                with override_settings(**overrides):
+                    row += f"{self.time_generation(size, options):>14.1f}"
+            self.stdout.write(row)
+
+    def time_generation(self, size, options):
+        samples = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            # Bypass the response cache so every repeat reaches the generator.
+            openai_service.generate_quiz_questions(options['subcategory_name'], options['difficulty'], size, use_cache=False)
+            samples.append((time.perf_counter() - started) * 1000)
+        return sorted(samples)[len(samples) // 2]
@@ -0,0 +1,89 @@
+import random
+import time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import UserProfile
+from quiz import leaderboard, percentiles, rank_index
+from quiz.management.commands.bench_start_quiz import percentile
+
+
+class Command(BaseCommand):
+    help = 'Time dashboard rendering against a large synthetic leaderboard (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=1000000)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--max-points', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Creating {options['profiles']} profiles...")
+            self.populate(options['profiles'], options['batch_size'], options['max_points'])
+            connection.queries_log.clear()
+
+            client = Client()
+            viewers = []
+            for label, points in [('top', options['max_points'] + 1), ('median', options['max_points'] // 2), ('none', 0)]:
+                user = User.objects.create_user(username=f'__bench_leaderboard_{label}__', password='unused')
+                UserProfile.objects.create(user=user, total_points=points)
+                viewers.append((label, user))
+
+            self.stdout.write(f"{'rank':<7}{'viewer':<10}{'cache':<7}{'queries':>8}{'p50 ms':>10}{'p99 ms':>10}")
+            for rank_mode in ('sql', 'index', 'pct'):
+                with override_settings(LEADERBOARD_RANK_INDEX=rank_mode == 'index',
+                                       LEADERBOARD_PERCENTILE_RANKS=rank_mode == 'pct'):
+                    if rank_mode == 'pct':
+                        # Refreshed out of band by refresh_points_histogram
+                        started = time.perf_counter()
+                        percentiles.refresh()
+                        self.stdout.write(f"Histogram rebuild: {(time.perf_counter() - started) * 1000:.0f} ms")
+                    for label, user in viewers:
+                        client.force_login(user)
+                        for cache_state in ('cold', 'warm'):
+                            queries, samples = self.run_dashboards(client, options['iterations'], cache_state == 'cold')
+                            self.stdout.write(
+                                f"{rank_mode:<7}{label:<10}{cache_state:<7}{queries:>8}"
+                                f"{percentile(samples, 50):>10.1f}{percentile(samples, 99):>10.1f}"
+                            )
+                    if rank_mode == 'index':
+                        started = time.perf_counter()
+                        for points in range(1, 10001):
+                            rank_index.index.rank(points)
+                        lookup_us = (time.perf_counter() - started) * 100
+                        stats = rank_index.index.snapshot()
+                        self.stdout.write(f"Rank index: {stats['players']} players, {stats['slots']} slots, "
+                                          f"{stats['bytes'] / 1024:.0f} KiB, {lookup_us:.1f} us per lookup")
+
+            transaction.set_rollback(True)
+        leaderboard.invalidate()
+        cache.delete(percentiles.CACHE_KEY)
+        rank_index.index = rank_index.RankIndex()
+
+    def populate(self, count, batch_size, max_points):
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            users = User.objects.bulk_create([
+                User(username=f'__bench_{start + i}', password='!') for i in range(size)
+            ])
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, total_points=random.randint(0, max_points)) for user in users
+            ])
+
+    def run_dashboards(self, client, iterations, cold):
+        samples = []
+        for _ in range(iterations):
+            if cold:
+                leaderboard.invalidate()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(reverse('quiz:dashboard'))
+                samples.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'dashboard returned {response.status_code}')
+        return len(queries), samples
@@ -0,0 +1,72 @@
+import json
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from quiz.management.commands.bench_start_quiz import percentile
+from quiz.materialize import materialize_quiz
+from quiz.models import Category, Subcategory
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'accounts.sessions',
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request session overhead of each SESSION_STORE on the autosave endpoint (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(username='__bench_sessions__', password='unused')
+            category = Category.objects.create(name='__bench_sessions__')
+            subcategory = Subcategory.objects.create(name='Bench', category=category)
+            questions = [{
+                'question': f'Question {i}?',
+                'option_a': 'A', 'option_b': 'B', 'option_c': 'C', 'option_d': 'D',
+                'correct_answer': 'A',
+            } for i in range(10)]
+            attempt = materialize_quiz(user, subcategory, 'easy', questions)
+            question_ids = list(attempt.quiz.questions.values_list('id', flat=True))
+            url = reverse('quiz:save_answers', args=[attempt.id])
+
+            self.stdout.write(f"{'store':<16}{'queries':>8}{'session':>9}{'cookie B':>10}{'p50 ms':>10}{'p99 ms':>10}")
+            for store, engine in ENGINES.items():
+                with override_settings(SESSION_ENGINE=engine):
+                    client = Client()
+                    client.force_login(user)
+                    samples = []
+                    for i in range(options['iterations']):
+                        body = json.dumps({'answers': {question_ids[i % 10]: 'A'}, 'current_question': i % 10})
+                        with CaptureQueriesContext(connection) as queries:
+                            started = time.perf_counter()
+                            response = client.post(url, body, content_type='application/json')
+                            samples.append((time.perf_counter() - started) * 1000)
+                        if response.status_code != 200:
+                            raise CommandError(f'{store}: autosave returned {response.status_code}')
+                    session_queries = sum('django_session' in q['sql'] for q in queries.captured_queries)
+                    cookie = len(client.cookies[settings.SESSION_COOKIE_NAME].value)
+                    self.stdout.write(
+                        f"{store:<16}{len(queries):>8}{session_queries:>9}{cookie:>10}"
+                        f"{percentile(samples, 50):>10.2f}{percentile(samples, 99):>10.2f}"
+                    )
+
+            # A session issued by the database store must survive the switch.
+            for store in ('cached_db', 'signed_cookies'):
+                client = Client()
+                with override_settings(SESSION_ENGINE=ENGINES['db']):
+                    client.force_login(user)
+                with override_settings(SESSION_ENGINE=ENGINES[store]):
+                    response = client.get(reverse('quiz:history'))
+                kept = 'kept' if response.status_code == 200 else f'lost ({response.status_code})'
+                self.stdout.write(f"db -> {store}: login {kept}")
+
+            transaction.set_rollback(True)
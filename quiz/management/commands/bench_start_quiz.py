@@ -0,0 +1,75 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from quiz import question_pool
+from quiz.models import Subcategory
+from quiz.openai_service import generate_quiz_questions
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Compare p50/p99 start_quiz latency with and without the question pool (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--num-questions', type=int, default=10, choices=[5, 10, 15, 20])
+        parser.add_argument('--difficulty', default='medium', choices=question_pool.DIFFICULTIES)
+        parser.add_argument('--subcategory', type=int, help='Subcategory id (defaults to the first one)')
+
+    def handle(self, *args, **options):
+        subcategories = Subcategory.objects.all()
+        if options['subcategory']:
+            subcategories = subcategories.filter(id=options['subcategory'])
+        subcategory = subcategories.first()
+        if not subcategory:
+            raise CommandError('No subcategory to benchmark against; run seed_data.py first.')
+
+        with transaction.atomic():
+            user = User.objects.create_user(username='__bench_start_quiz__', password='unused')
+            client = Client()
+            client.force_login(user)
+            payload = {
+                'subcategory_id': subcategory.id,
+                'difficulty': options['difficulty'],
+                'num_questions': options['num_questions'],
+            }
+
+            # Coalescing and the response cache would answer most starts
+            # without reaching the generator.
+            with override_settings(QUESTION_POOL_ENABLED=False, SINGLE_FLIGHT_ENABLED=False,
+                                   QUIZ_GENERATION_CACHE_ENABLED=False):
+                direct = self.run_starts(client, payload, options['iterations'])
+
+            needed = options['iterations'] * options['num_questions']
+            while question_pool.pool_depth(subcategory, options['difficulty']) < needed:
+                questions = generate_quiz_questions(subcategory.name, options['difficulty'], 20,
+                                                    allow_fallback=False, use_cache=False)
+                if not question_pool.add_questions(subcategory, options['difficulty'], questions):
+                    raise CommandError('The generator returned no questions to fill the pool with.')
+
+            with override_settings(QUESTION_POOL_ENABLED=True):
+                pooled = self.run_starts(client, payload, options['iterations'])
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'mode':<10}{'p50 ms':>10}{'p99 ms':>10}")
+        for label, samples in [('generator', direct), ('pool', pooled)]:
+            self.stdout.write(f"{label:<10}{percentile(samples, 50):>10.1f}{percentile(samples, 99):>10.1f}")
+
+    def run_starts(self, client, payload, iterations):
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = client.post(reverse('quiz:start'), payload)
+            samples.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 302:
+                raise CommandError(f'start_quiz returned {response.status_code}')
+        return samples
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from quiz import rollups
+
+
+class Command(BaseCommand):
+    help = 'Backfill the points ledger from completed attempts and recompute every leaderboard rollup from it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--skip-backfill', action='store_true',
+                            help='Only recompute rollups from the existing ledger')
+
+    def handle(self, *args, **options):
+        if not options['skip_backfill']:
+            added = rollups.backfill_ledger(batch_size=options['batch_size'])
+            self.stdout.write(f"Added {added} ledger entries")
+        rebuilt = rollups.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(f"Rebuilt {rebuilt} rollups")
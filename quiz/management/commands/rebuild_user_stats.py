@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from quiz import user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user attempt totals stored on UserProfile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only rebuild this user id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = user_stats.rebuild(options['users'], batch_size=options['batch_size'])
+        self.stdout.write(f"Updated stats for {updated} profiles")
@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from quiz import question_pool
+
+
+class Command(BaseCommand):
+    help = 'Top up the pre-generated question pool for every subcategory and difficulty'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subcategory', type=int, action='append', dest='subcategories',
+                            help='Only refill this subcategory id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help='Questions requested from the generator per call')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and refill every --interval seconds')
+        parser.add_argument('--interval', type=int, default=30)
+
+    def handle(self, *args, **options):
+        while True:
+            added = question_pool.refill_all(options['subcategories'], batch_size=options['batch_size'])
+            total = sum(added.values())
+            if total or options['verbosity'] > 1:
+                self.stdout.write(f"Added {total} questions across {len(added)} pools")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,30 @@
+import time
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from quiz import percentiles
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the total_points histogram used for percentile ranks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and refresh every --interval seconds')
+        parser.add_argument('--interval', type=int, default=None,
+                            help='Defaults to LEADERBOARD_HISTOGRAM_REFRESH')
+
+    def handle(self, *args, **options):
+        # The histogram is only visible to web workers through a shared
+        # default cache; a per-process one would be discarded on exit.
+        if isinstance(caches['default'], LocMemCache):
+            raise CommandError('The default cache is per-process; set CACHE_URL so web workers can read the histogram.')
+
+        interval = options['interval'] or percentiles.refresh_seconds()
+        while True:
+            histogram = percentiles.refresh()
+            if options['verbosity'] > 1 or not options['loop']:
+                self.stdout.write(f"Histogram covers {histogram['total']} ranked players")
+            if not options['loop']:
+                break
+            time.sleep(interval)
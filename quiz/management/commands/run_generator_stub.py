@@ -0,0 +1,60 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand
+from quiz.generator_backends import LocalCorpusGenerator
+
+
+class Command(BaseCommand):
+    help = 'Serve local-corpus questions over HTTP with simulated latency and errors, for HttpStubGenerator'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=int, default=2000, help='Base response delay')
+        parser.add_argument('--jitter-ms', type=int, default=500, help='Uniform random delay added on top')
+        parser.add_argument('--per-question-ms', type=int, default=0,
+                            help='Extra delay per requested question, to mimic output-length latency')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 503')
+
+    def handle(self, *args, **options):
+        corpus = LocalCorpusGenerator()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                num_questions = int(request.get('num_questions', 10))
+
+                delay = options['latency_ms'] + random.uniform(0, options['jitter_ms'])
+                delay += options['per_question_ms'] * num_questions
+                time.sleep(delay / 1000)
+
+                if random.random() < options['error_rate']:
+                    self.send_error(503, 'Simulated generator failure')
+                    return
+
+                body = corpus.generate_content(
+                    request.get('prompt', ''),
+                    request.get('subcategory_name', ''),
+                    request.get('difficulty', 'medium'),
+                    num_questions,
+                ).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(f"Generator stub listening on http://{options['host']}:{options['port']}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from quiz import scoring, streaming
+
+
+class Command(BaseCommand):
+    help = 'Score and complete in-progress attempts whose deadline has passed, and close abandoned streamed quizzes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Attempts completed per sweep')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and sweep every --interval seconds')
+        parser.add_argument('--interval', type=int, default=60)
+
+    def handle(self, *args, **options):
+        while True:
+            finalized = streaming.finalize_stale_quizzes(batch_size=options['batch_size'])
+            if finalized or options['verbosity'] > 1:
+                self.stdout.write(f"Closed {finalized} abandoned streamed quizzes")
+            completed = scoring.sweep_expired_attempts(batch_size=options['batch_size'])
+            if completed or options['verbosity'] > 1:
+                self.stdout.write(f"Completed {completed} expired attempts")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
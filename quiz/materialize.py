@@ -0,0 +1,86 @@
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import Quiz, Question, QuizAttempt
+from . import user_stats
+
+REQUIRED_FIELDS = ['question', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer']
+OPTION_MAX_LENGTH = Question._meta.get_field('option_a').max_length
+
+
+def clean_question(question):
+    if not isinstance(question, dict):
+        return None
+    if not all(isinstance(question.get(field), str) and question[field].strip() for field in REQUIRED_FIELDS):
+        return None
+    correct = question['correct_answer'].strip().upper()
+    if correct not in ('A', 'B', 'C', 'D'):
+        return None
+    explanation = question.get('explanation')
+    return {
+        'question': question['question'].strip(),
+        'option_a': question['option_a'].strip()[:OPTION_MAX_LENGTH],
+        'option_b': question['option_b'].strip()[:OPTION_MAX_LENGTH],
+        'option_c': question['option_c'].strip()[:OPTION_MAX_LENGTH],
+        'option_d': question['option_d'].strip()[:OPTION_MAX_LENGTH],
+        'correct_answer': correct,
+        'explanation': explanation.strip() if isinstance(explanation, str) else '',
+    }
+
+
+def clean_questions(questions):
+    cleaned = []
+    seen = set()
+    for question in questions or []:
+        question = clean_question(question)
+        if question and question['question'] not in seen:
+            seen.add(question['question'])
+            cleaned.append(question)
+    return cleaned
+
+
+def build_question(quiz, question, order):
+    return Question(
+        quiz=quiz,
+        question_text=question['question'],
+        option_a=question['option_a'],
+        option_b=question['option_b'],
+        option_c=question['option_c'],
+        option_d=question['option_d'],
+        correct_answer=question['correct_answer'],
+        explanation=question['explanation'],
+        order=order
+    )
+
+
+def materialize_quiz(user, subcategory, difficulty, questions, total_questions=None, is_generating=False):
+    # Builds the quiz, its questions and the user's attempt in one transaction
+    # with a fixed number of queries, replacing any abandoned in-progress
+    # attempt. Returns None when the payload has no usable questions.
+    questions = clean_questions(questions)
+    if not questions:
+        return None
+    total_questions = total_questions or len(questions)
+
+    with transaction.atomic():
+        QuizAttempt.objects.filter(user=user, status='in_progress').delete()
+
+        quiz = Quiz.objects.create(
+            title=f"{subcategory.name} Quiz - {difficulty.capitalize()}",
+            difficulty=difficulty,
+            subcategory=subcategory,
+            time_limit=total_questions * 60,
+            is_generating=is_generating
+        )
+        Question.objects.bulk_create([build_question(quiz, q, i) for i, q in enumerate(questions)])
+        started_at = timezone.now()
+        attempt = QuizAttempt.objects.create(
+            user=user,
+            quiz=quiz,
+            total_questions=total_questions,
+            started_at=started_at,
+            expires_at=started_at + timedelta(seconds=quiz.time_limit),
+            status='in_progress'
+        )
+        user_stats.attempt_started(user.id)
+    return attempt
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PooledQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('difficulty', models.CharField(choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard')], max_length=20)),
+                ('question_text', models.TextField()),
+                ('option_a', models.CharField(max_length=500)),
+                ('option_b', models.CharField(max_length=500)),
+                ('option_c', models.CharField(max_length=500)),
+                ('option_d', models.CharField(max_length=500)),
+                ('correct_answer', models.CharField(choices=[('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D')], max_length=1)),
+                ('explanation', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('subcategory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pooled_questions', to='quiz.subcategory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['subcategory', 'difficulty', 'created_at'], name='quiz_pooled_subcate_7dacff_idx')],
+            },
+        ),
+    ]
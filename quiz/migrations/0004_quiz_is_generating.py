@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0003_generationflight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='is_generating',
+            field=models.BooleanField(default=False),
+        ),
+    ]
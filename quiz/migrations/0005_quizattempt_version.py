@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0004_quiz_is_generating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:05
+
+from datetime import timedelta
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_expires_at(apps, schema_editor):
+    # In-progress attempts keep whatever time the client last reported; older
+    # rows without one get the quiz's full time limit from when they started.
+    QuizAttempt = apps.get_model('quiz', 'QuizAttempt')
+    now = timezone.now()
+    attempts = QuizAttempt.objects.filter(status='in_progress', expires_at__isnull=True).select_related('quiz')
+    for attempt in attempts.iterator():
+        if attempt.time_remaining is not None:
+            attempt.expires_at = now + timedelta(seconds=attempt.time_remaining)
+        else:
+            attempt.expires_at = attempt.started_at + timedelta(seconds=attempt.quiz.time_limit)
+        attempt.save(update_fields=['expires_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0005_quizattempt_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0007_points_ledger_and_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='results',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -37,9 +37,13 @@ class Quiz(models.Model):
     subcategory = models.ForeignKey(Subcategory, on_delete=models.CASCADE, related_name='quizzes')
     time_limit = models.IntegerField(default=600)
     created_at = models.DateTimeField(default=timezone.now)
+    is_generating = models.BooleanField(default=False)
     
     class Meta:
         verbose_name_plural = "Quizzes"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='quiz_created_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -65,6 +69,60 @@ class Question(models.Model):
         return f"Q{self.order + 1}: {self.question_text[:50]}..."
 
 
+class PooledQuestion(models.Model):
+    subcategory = models.ForeignKey(Subcategory, on_delete=models.CASCADE, related_name='pooled_questions')
+    difficulty = models.CharField(max_length=20, choices=[
+        ('easy', 'Easy'),
+        ('medium', 'Medium'),
+        ('hard', 'Hard'),
+    ])
+    question_text = models.TextField()
+    option_a = models.CharField(max_length=500)
+    option_b = models.CharField(max_length=500)
+    option_c = models.CharField(max_length=500)
+    option_d = models.CharField(max_length=500)
+    correct_answer = models.CharField(max_length=1, choices=[
+        ('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D')
+    ])
+    explanation = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['subcategory', 'difficulty', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subcategory.name} ({self.difficulty}): {self.question_text[:50]}..."
+    
+    def as_payload(self):
+        return {
+            'question': self.question_text,
+            'option_a': self.option_a,
+            'option_b': self.option_b,
+            'option_c': self.option_c,
+            'option_d': self.option_d,
+            'correct_answer': self.correct_answer,
+            'explanation': self.explanation,
+        }
+
+
+class GenerationFlight(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+    ]
+    
+    key = models.CharField(max_length=64, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.key[:12]} ({self.status})"
+
+
 class QuizAttempt(models.Model):
     STATUS_CHOICES = [
         ('in_progress', 'In Progress'),
@@ -80,9 +138,23 @@ class QuizAttempt(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     current_question = models.IntegerField(default=0)
     time_remaining = models.IntegerField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    version = models.IntegerField(default=0)
+    results = models.JSONField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['started_at', 'id'], name='attempt_started_idx'),
+            models.Index(fields=['user', 'started_at', 'id'], name='attempt_user_started_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.quiz.title} ({self.status})"
+    
+    def seconds_remaining(self):
+        if self.expires_at is None:
+            return None
+        return max(0, int((self.expires_at - timezone.now()).total_seconds()))
 
 
 class UserAnswer(models.Model):
@@ -96,3 +168,54 @@ class UserAnswer(models.Model):
     
     def __str__(self):
         return f"{self.attempt.user.username} - Q{self.question.order + 1}: {self.selected_answer}"
+
+
+class PointsEntry(models.Model):
+    # Ledger rows outlive their attempts; without a constraint, deleting
+    # attempts does not have to touch the ledger.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='points_entries')
+    attempt = models.OneToOneField(
+        QuizAttempt, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name='points_entry',
+    )
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    points = models.IntegerField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.points} pts"
+
+
+class LeaderboardRollup(models.Model):
+    PERIOD_CHOICES = [
+        ('week', 'Weekly'),
+        ('month', 'Monthly'),
+        ('all', 'All Time'),
+    ]
+    
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_rollups')
+    points = models.IntegerField(default=0)
+    quizzes = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'period_start', 'category', 'user'],
+                condition=models.Q(category__isnull=False),
+                name='unique_category_rollup',
+            ),
+            models.UniqueConstraint(
+                fields=['period', 'period_start', 'user'],
+                condition=models.Q(category__isnull=True),
+                name='unique_overall_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'period_start', 'category', '-points'], name='rollup_board_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.period} {self.period_start} {self.user_id}: {self.points}"
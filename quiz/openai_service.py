@@ -1,27 +1,22 @@
-import os
 import json
 import logging
-from google import genai
-from google.genai import types
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from . import generation_cache, resilience
+from .generator_backends import RESPONSE_CONFIG, get_generator
 
-# IMPORTANT: Using Gemini API for quiz generation
-# Note that the newest Gemini model series is "gemini-2.5-flash"
-# do not change this unless explicitly requested by the user
 
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+def build_prompt(subcategory_name, difficulty, num_questions, part=None):
+    focus = ""
+    if part:
+        index, parts = part
+        focus = f"""
 
-client = None
-if GEMINI_API_KEY:
-    client = genai.Client(api_key=GEMINI_API_KEY)
-
-
-def generate_quiz_questions(subcategory_name, difficulty, num_questions=10):
-    if not client:
-        logging.warning("Gemini API key not configured, using fallback questions")
-        return generate_fallback_questions(subcategory_name, difficulty, num_questions)
-    
-    try:
-        prompt = f"""Generate {num_questions} multiple-choice quiz questions about {subcategory_name} at {difficulty} difficulty level.
+This request is part {index + 1} of {parts} of a larger quiz generated in parallel.
+Focus on area {index + 1} of {parts} of the topic so questions do not overlap with the other parts."""
+    return f"""Generate {num_questions} multiple-choice quiz questions about {subcategory_name} at {difficulty} difficulty level.
 
 Return a JSON object with this exact structure:
 {{
@@ -42,22 +37,181 @@ Make the questions educational and engaging. Ensure only one answer is correct.
 For {difficulty} difficulty:
 - Easy: Basic concepts, straightforward questions
 - Medium: Requires some knowledge and thinking
-- Hard: Advanced concepts, requires deep understanding"""
-
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-            ),
-        )
-        
-        result = json.loads(response.text)
-        return result.get("questions", [])
+- Hard: Advanced concepts, requires deep understanding{focus}"""
+
+
+def _request_questions(subcategory_name, difficulty, num_questions, part=None, use_cache=True):
+    num_requested = generation_cache.oversampled(num_questions) if use_cache else num_questions
+    prompt = build_prompt(subcategory_name, difficulty, num_requested, part)
+    generator = get_generator()
+    key = generation_cache.cache_key(generator.model_name, prompt, RESPONSE_CONFIG)
+    
+    cached = generation_cache.lookup(key) if use_cache else None
+    if cached is not None:
+        return generation_cache.sample(cached, num_questions, reshuffle=True)
+    
+    text = resilience.guarded_call(generator.generate_content, prompt, subcategory_name, difficulty, num_requested)
+    result = json.loads(text)
+    questions = result.get("questions", [])
+    if use_cache:
+        generation_cache.store(key, questions)
+    return generation_cache.sample(questions, num_questions)
+
+
+def _normalise_question(question):
+    return re.sub(r'[^a-z0-9]+', ' ', str(question.get('question', '')).lower()).strip()
+
+
+def dedupe_questions(questions):
+    seen = set()
+    unique = []
+    for question in questions:
+        key = _normalise_question(question)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(question)
+    return unique
+
+
+def _generate_chunked(subcategory_name, difficulty, num_questions, chunk_size, max_workers, use_cache=True):
+    sizes = [chunk_size] * (num_questions // chunk_size)
+    if num_questions % chunk_size:
+        sizes.append(num_questions % chunk_size)
+    
+    chunks = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(sizes))) as executor:
+        futures = [
+            executor.submit(_request_questions, subcategory_name, difficulty, size, (i, len(sizes)), use_cache)
+            for i, size in enumerate(sizes)
+        ]
+        for future in futures:
+            try:
+                chunks.append(future.result())
+            except Exception as e:
+                logging.error(f"Error generating question chunk: {e}")
+    
+    if not chunks:
+        raise RuntimeError("All question chunks failed")
+    
+    questions = dedupe_questions(q for chunk in chunks for q in chunk)
+    missing = num_questions - len(questions)
+    if missing > 0:
+        questions = dedupe_questions(questions + _request_questions(subcategory_name, difficulty, missing, use_cache=use_cache))
+    return questions[:num_questions]
+
+
+def generate_quiz_questions(subcategory_name, difficulty, num_questions=10, allow_fallback=True, use_cache=True):
+    if not get_generator().is_available():
+        logging.warning("Question generator not configured, using fallback questions")
+        if not allow_fallback:
+            return []
+        return generate_fallback_questions(subcategory_name, difficulty, num_questions)
+    
+    chunk_size = getattr(settings, 'QUIZ_GENERATION_CHUNK_SIZE', 0)
+    max_workers = getattr(settings, 'QUIZ_GENERATION_MAX_CONCURRENCY', 4)
+    try:
+        if chunk_size and num_questions > chunk_size:
+            return _generate_chunked(subcategory_name, difficulty, num_questions, chunk_size, max_workers, use_cache)
+        return _request_questions(subcategory_name, difficulty, num_questions, use_cache=use_cache)
     
     except Exception as e:
         logging.error(f"Error generating questions: {e}")
-        return generate_fallback_questions(subcategory_name, difficulty, num_questions)
+        if not allow_fallback:
+            return []
+        return stored_or_fallback_questions(subcategory_name, difficulty, num_questions)
+
+
+class QuestionStreamParser:
+    # Incrementally extracts complete objects from the "questions" array of a
+    # JSON document that arrives in arbitrary text chunks.
+    
+    def __init__(self):
+        self.buffer = ''
+        self.position = None
+        self.finished = False
+        self.decoder = json.JSONDecoder()
+    
+    def feed(self, text):
+        self.buffer += text
+        questions = []
+        if self.position is None:
+            match = re.search(r'"questions"\s*:\s*\[', self.buffer)
+            if not match:
+                return questions
+            self.position = match.end()
+        
+        while not self.finished:
+            pos = self.position
+            while pos < len(self.buffer) and self.buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(self.buffer):
+                break
+            if self.buffer[pos] == ']':
+                self.finished = True
+                break
+            try:
+                item, end = self.decoder.raw_decode(self.buffer, pos)
+            except json.JSONDecodeError:
+                break
+            self.position = end
+            if isinstance(item, dict):
+                questions.append(item)
+        
+        self.buffer = self.buffer[self.position:]
+        self.position = 0
+        return questions
+
+
+def stream_quiz_questions(subcategory_name, difficulty, num_questions=10):
+    if not get_generator().is_available():
+        logging.warning("Question generator not configured, using fallback questions")
+        yield from generate_fallback_questions(subcategory_name, difficulty, num_questions)
+        return
+    
+    if not resilience.breaker.allow():
+        logging.error("Error streaming questions: question generator circuit is open")
+        yield from stored_or_fallback_questions(subcategory_name, difficulty, num_questions)
+        return
+    
+    produced = 0
+    failed = False
+    first_chunk_seconds = None
+    started = time.monotonic()
+    try:
+        parser = QuestionStreamParser()
+        prompt = build_prompt(subcategory_name, difficulty, num_questions)
+        stream = get_generator().stream_content(prompt, subcategory_name, difficulty, num_questions)
+        for text in stream:
+            if first_chunk_seconds is None:
+                first_chunk_seconds = time.monotonic() - started
+            for question in parser.feed(text):
+                produced += 1
+                yield question
+                if produced >= num_questions:
+                    return
+    except Exception as e:
+        logging.error(f"Error streaming questions: {e}")
+        failed = True
+    finally:
+        # Runs on every exit, including the early return and a consumer that
+        # stops iterating, so a half-open trial is always settled. A stream is
+        # judged on time to first chunk: a long quiz legitimately streams for
+        # longer than the slow-call threshold.
+        if failed or first_chunk_seconds is None:
+            resilience.breaker.record_failure()
+        else:
+            resilience.breaker.record_success(first_chunk_seconds)
+    
+    if not produced:
+        yield from stored_or_fallback_questions(subcategory_name, difficulty, num_questions)
+
+
+def stored_or_fallback_questions(subcategory_name, difficulty, num_questions):
+    from .question_pool import sample_stored_questions
+    questions = sample_stored_questions(subcategory_name, difficulty, num_questions)
+    if len(questions) >= num_questions:
+        return questions
+    return generate_fallback_questions(subcategory_name, difficulty, num_questions)
 
 
 def generate_fallback_questions(subcategory_name, difficulty, num_questions):
@@ -0,0 +1,45 @@
+import base64
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# Keyset pagination for the history and admin listings. Rows are ordered
+# newest first on (timestamp, id) and the cursor is the last row's pair, so
+# every page is an index range scan of page_size + 1 rows however deep the
+# reader has scrolled: no OFFSET, and no COUNT over the table.
+
+
+def page_size():
+    return getattr(settings, 'LIST_PAGE_SIZE', 50)
+
+
+def encode_cursor(value, pk):
+    raw = f'{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        value, pk = raw.rsplit('|', 1)
+        return parse_datetime(value), int(pk)
+    except ValueError:
+        return None
+
+
+def page(queryset, field, cursor=None, size=None):
+    size = size or page_size()
+    position = decode_cursor(cursor) if cursor else None
+    if position and position[0]:
+        value, pk = position
+        # The redundant <= bound keeps the scan a single index range on
+        # backends that don't turn the OR into a row comparison.
+        queryset = queryset.filter(**{f'{field}__lte': value}).filter(
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+        )
+    rows = list(queryset.order_by(f'-{field}', '-pk')[:size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(getattr(rows[-1], field), rows[-1].pk)
+    return rows, next_cursor
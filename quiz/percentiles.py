@@ -0,0 +1,77 @@
+import math
+from array import array
+from bisect import bisect_left
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+# Approximate "top x%" standing for players outside the leaderboard top-N.
+# The histogram is equi-depth: boundary i is the points value at which the
+# (i + 1)/resolution share of ranked players is reached, counting from the
+# top. A lookup is a binary search over the boundaries and is off by at most
+# one bucket, i.e. 100/resolution percentage points (0.1 at the default
+# 1000). It is rebuilt from one GROUP BY on total_points and stored in the
+# default cache as packed 32-bit integers (4 KB at the default resolution).
+# `manage.py refresh_points_histogram` can only refresh it for the web
+# workers when that cache is shared (CACHE_URL); otherwise each worker
+# rebuilds its own copy lazily once the previous one expires.
+
+CACHE_KEY = 'leaderboard:histogram'
+
+
+def enabled():
+    return getattr(settings, 'LEADERBOARD_PERCENTILE_RANKS', True)
+
+
+def resolution():
+    return getattr(settings, 'LEADERBOARD_HISTOGRAM_RESOLUTION', 1000)
+
+
+def refresh_seconds():
+    return getattr(settings, 'LEADERBOARD_HISTOGRAM_REFRESH', 300)
+
+
+def build():
+    from accounts.models import UserProfile
+    rows = UserProfile.objects.filter(total_points__gt=0).values_list('total_points').annotate(
+        players=Count('id'),
+    ).order_by('-total_points')
+    rows = list(rows)
+    total = sum(players for points, players in rows)
+    buckets = min(resolution(), total)
+
+    # Stored ascending so lookups can use bisect.
+    boundaries = array('i')
+    seen = 0
+    for points, players in rows:
+        seen += players
+        while len(boundaries) < buckets and seen * buckets >= (len(boundaries) + 1) * total:
+            boundaries.append(points)
+    boundaries.reverse()
+    return {'total': total, 'boundaries': boundaries.tobytes()}
+
+
+def refresh():
+    histogram = build()
+    # Expires after two refresh periods so a stopped refresher degrades to
+    # lazy rebuilds rather than serving stale data forever.
+    cache.set(CACHE_KEY, histogram, refresh_seconds() * 2)
+    return histogram
+
+
+def histogram():
+    return cache.get(CACHE_KEY) or refresh()
+
+
+def top_percent(points):
+    if points <= 0:
+        return None
+    data = histogram()
+    boundaries = array('i')
+    boundaries.frombytes(data['boundaries'])
+    if not data['total'] or not boundaries:
+        return None
+    # Buckets whose boundary is above the player's points are entirely
+    # ahead of them.
+    ahead = len(boundaries) - bisect_left(boundaries, points + 1)
+    return max(1, min(100, math.ceil(100 * (ahead + 1) / len(boundaries))))
@@ -0,0 +1,140 @@
+import logging
+import random
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from .materialize import materialize_quiz
+from .models import Subcategory, Question, PooledQuestion
+from .openai_service import generate_quiz_questions
+
+DIFFICULTIES = ['easy', 'medium', 'hard']
+
+
+def pool_enabled():
+    return getattr(settings, 'QUESTION_POOL_ENABLED', True)
+
+
+def low_watermark():
+    return getattr(settings, 'QUESTION_POOL_LOW_WATERMARK', 20)
+
+
+def high_watermark():
+    return getattr(settings, 'QUESTION_POOL_HIGH_WATERMARK', 60)
+
+
+def pool_depth(subcategory, difficulty):
+    return PooledQuestion.objects.filter(subcategory=subcategory, difficulty=difficulty).count()
+
+
+def take_questions(subcategory, difficulty, num_questions):
+    # Questions are consumed from the pool so two quizzes never share a row.
+    # SKIP LOCKED lets concurrent starts claim disjoint rows without waiting.
+    with transaction.atomic():
+        pooled = list(
+            PooledQuestion.objects.select_for_update(skip_locked=True)
+            .filter(subcategory=subcategory, difficulty=difficulty)
+            .order_by('created_at')[:num_questions]
+        )
+        if len(pooled) < num_questions:
+            return []
+        PooledQuestion.objects.filter(id__in=[p.id for p in pooled]).delete()
+
+    questions = [p.as_payload() for p in pooled]
+    random.shuffle(questions)
+    return questions
+
+
+def start_pooled_quiz(user, subcategory, difficulty, num_questions):
+    # Claims the rows and builds the quiz from them in one transaction, so a
+    # failure while materialising puts the rows back in the pool instead of
+    # losing them. Returns None when the pool is too shallow.
+    with transaction.atomic():
+        questions = take_questions(subcategory, difficulty, num_questions)
+        if not questions:
+            return None
+        return materialize_quiz(user, subcategory, difficulty, questions)
+
+
+def add_questions(subcategory, difficulty, questions):
+    pooled = []
+    for q in questions:
+        try:
+            pooled.append(PooledQuestion(
+                subcategory=subcategory,
+                difficulty=difficulty,
+                question_text=q['question'],
+                option_a=q['option_a'],
+                option_b=q['option_b'],
+                option_c=q['option_c'],
+                option_d=q['option_d'],
+                correct_answer=q['correct_answer'],
+                explanation=q.get('explanation', ''),
+            ))
+        except KeyError:
+            logging.warning(f"Skipping malformed generated question for {subcategory.name}")
+    PooledQuestion.objects.bulk_create(pooled)
+    return len(pooled)
+
+
+def refill(subcategory, difficulty, depth=None, batch_size=20):
+    if depth is None:
+        depth = pool_depth(subcategory, difficulty)
+    if depth >= low_watermark():
+        return 0
+
+    added = 0
+    while depth + added < high_watermark():
+        wanted = min(batch_size, high_watermark() - depth - added)
+        questions = generate_quiz_questions(subcategory.name, difficulty, wanted, allow_fallback=False, use_cache=False)
+        stored = add_questions(subcategory, difficulty, questions)
+        if not stored:
+            logging.warning(f"Question pool refill for {subcategory} ({difficulty}) got no questions")
+            break
+        added += stored
+    return added
+
+
+def refill_all(subcategory_ids=None, batch_size=20):
+    depths = {
+        (row['subcategory_id'], row['difficulty']): row['depth']
+        for row in PooledQuestion.objects.values('subcategory_id', 'difficulty').annotate(depth=Count('id'))
+    }
+    subcategories = Subcategory.objects.all()
+    if subcategory_ids:
+        subcategories = subcategories.filter(id__in=subcategory_ids)
+
+    added = {}
+    for subcategory in subcategories:
+        for difficulty in DIFFICULTIES:
+            depth = depths.get((subcategory.id, difficulty), 0)
+            if depth >= low_watermark():
+                continue
+            added[(subcategory.id, difficulty)] = refill(subcategory, difficulty, depth=depth, batch_size=batch_size)
+    return added
+
+
+def sample_stored_questions(subcategory_name, difficulty, num_questions):
+    # Serves questions without calling the generator, for when it is failing:
+    # recent pool entries first (left in place), then questions from earlier
+    # quizzes on the same topic.
+    candidates = [
+        p.as_payload() for p in PooledQuestion.objects.filter(
+            subcategory__name=subcategory_name, difficulty=difficulty
+        ).order_by('-created_at')[:num_questions * 4]
+    ]
+    if len(candidates) < num_questions:
+        previous = Question.objects.filter(
+            quiz__subcategory__name=subcategory_name, quiz__difficulty=difficulty
+        ).exclude(question_text__startswith='Sample question ').order_by('-id')[:num_questions * 4]
+        candidates += [{
+            'question': q.question_text,
+            'option_a': q.option_a,
+            'option_b': q.option_b,
+            'option_c': q.option_c,
+            'option_d': q.option_d,
+            'correct_answer': q.correct_answer,
+            'explanation': q.explanation,
+        } for q in previous]
+
+    unique = list({q['question']: q for q in candidates}.values())
+    return random.sample(unique, min(num_questions, len(unique)))
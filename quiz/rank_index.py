@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from array import array
+from django.conf import settings
+from django.db.models import Count
+
+# Optional per-process order-statistic index over UserProfile.total_points.
+# A Fenwick tree holds the number of players at each points value, so "how
+# many players are ahead of x" is an O(log max_points) lookup instead of an
+# index range count. It is built from one GROUP BY query on first use, kept
+# current from the points_changed / post_save / post_delete signals, and
+# rebuilt in the background every LEADERBOARD_RANK_INDEX_RECONCILE seconds to
+# absorb changes made by other processes.
+#
+# Memory does not depend on the number of players: the tree is one signed
+# 64-bit counter per possible points value, growing by doubling. Points up to
+# 1,048,575 take 8 MiB whether there are ten thousand or ten million players;
+# a million players spread over 0-50,000 points need 512 KiB.
+
+
+def enabled():
+    return getattr(settings, 'LEADERBOARD_RANK_INDEX', False)
+
+
+def reconcile_interval():
+    return getattr(settings, 'LEADERBOARD_RANK_INDEX_RECONCILE', 300)
+
+
+class FenwickTree:
+    def __init__(self, size=1024):
+        self.tree = array('q', bytes(8 * (size + 1)))
+        self.total = 0
+
+    @property
+    def size(self):
+        return len(self.tree) - 1
+
+    @classmethod
+    def from_counts(cls, counts):
+        # counts: {points: players}. Linear-time construction.
+        size = 1024
+        highest = max(counts, default=0)
+        while size <= highest:
+            size *= 2
+        fenwick = cls(size)
+        tree = fenwick.tree
+        for points, players in counts.items():
+            tree[points + 1] += players
+            fenwick.total += players
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        return fenwick
+
+    def _grow(self, points):
+        counts = {}
+        for value in range(self.size):
+            players = self.count_at(value)
+            if players:
+                counts[value] = players
+        counts[points] = counts.get(points, 0)
+        grown = FenwickTree.from_counts(counts)
+        self.tree, self.total = grown.tree, grown.total
+
+    def add(self, points, delta):
+        if points >= self.size:
+            self._grow(points)
+        i = points + 1
+        tree = self.tree
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+        self.total += delta
+
+    def count_at_most(self, points):
+        i = min(points, self.size - 1) + 1
+        result = 0
+        tree = self.tree
+        while i > 0:
+            result += tree[i]
+            i -= i & -i
+        return result
+
+    def count_at(self, points):
+        return self.count_at_most(points) - (self.count_at_most(points - 1) if points > 0 else 0)
+
+    def count_above(self, points):
+        return self.total - self.count_at_most(points)
+
+
+class RankIndex:
+    def __init__(self):
+        self.tree = None
+        self.built_at = None
+        self.lock = threading.Lock()
+        self.rebuilding = False
+
+    def build(self):
+        from accounts.models import UserProfile
+        rows = UserProfile.objects.filter(total_points__gt=0).values_list('total_points').annotate(players=Count('id'))
+        tree = FenwickTree.from_counts(dict(rows))
+        with self.lock:
+            self.tree = tree
+            self.built_at = time.monotonic()
+
+    def _reconcile_in_background(self):
+        def run():
+            from django.db import connection
+            try:
+                self.build()
+            except Exception as e:
+                logging.error(f"Rank index rebuild failed: {e}")
+            finally:
+                self.rebuilding = False
+                connection.close()
+
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        threading.Thread(target=run, daemon=True).start()
+
+    def rank(self, points):
+        if points <= 0:
+            return None
+        if self.tree is None:
+            self.build()
+        elif time.monotonic() - self.built_at >= reconcile_interval():
+            self._reconcile_in_background()
+        with self.lock:
+            return self.tree.count_above(points) + 1
+
+    def move(self, old_points, new_points):
+        if self.tree is None or old_points == new_points:
+            return
+        with self.lock:
+            if old_points > 0:
+                self.tree.add(old_points, -1)
+            if new_points > 0:
+                self.tree.add(new_points, 1)
+
+    def snapshot(self):
+        return {
+            'built': self.tree is not None,
+            'players': self.tree.total if self.tree else 0,
+            'slots': self.tree.size if self.tree else 0,
+            'bytes': self.tree.tree.itemsize * len(self.tree.tree) if self.tree else 0,
+            'age_seconds': round(time.monotonic() - self.built_at, 1) if self.built_at else None,
+        }
+
+
+index = RankIndex()
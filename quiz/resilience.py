@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from django.conf import settings
+
+# Guards calls to the question generator with a hard deadline, a circuit
+# breaker and optional hedged requests. State is per worker process; the
+# generator_health admin endpoint exposes it for monitoring.
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class GeneratorTimeout(Exception):
+    pass
+
+
+class LatencyTracker:
+    def __init__(self, size=500):
+        self.samples = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct):
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+    def snapshot(self):
+        return {
+            'samples': len(self.samples),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def failure_threshold(self):
+        return getattr(settings, 'QUIZ_BREAKER_FAILURE_THRESHOLD', 5)
+
+    def slow_call_seconds(self):
+        return getattr(settings, 'QUIZ_BREAKER_SLOW_CALL_SECONDS', 15)
+
+    def reset_timeout(self):
+        return getattr(settings, 'QUIZ_BREAKER_RESET_TIMEOUT', 30)
+
+    def allow(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout():
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self, seconds):
+        if seconds >= self.slow_call_seconds():
+            self.record_failure()
+            return
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold():
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'open_for_seconds': round(time.monotonic() - self.opened_at, 1) if self.state != self.CLOSED else None,
+        }
+
+
+breaker = CircuitBreaker()
+latency = LatencyTracker()
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'QUIZ_GENERATOR_MAX_INFLIGHT', 16))
+
+
+def deadline_seconds():
+    return getattr(settings, 'QUIZ_GENERATOR_DEADLINE', 20)
+
+
+def _hedge_delay():
+    if not getattr(settings, 'QUIZ_GENERATOR_HEDGING', False):
+        return None
+    if len(latency.samples) < getattr(settings, 'QUIZ_GENERATOR_HEDGE_MIN_SAMPLES', 20):
+        return None
+    return latency.percentile(95)
+
+
+def _first_result(futures, started, deadline):
+    pending = set(futures)
+    error = None
+    while pending:
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    if error and not pending:
+        raise error
+    raise GeneratorTimeout(f"Generator call exceeded {deadline}s deadline")
+
+
+def guarded_call(fn, *args):
+    if not breaker.allow():
+        raise CircuitOpenError("Question generator circuit is open")
+
+    started = time.monotonic()
+    deadline = deadline_seconds()
+    futures = [_executor.submit(fn, *args)]
+    try:
+        hedge_after = _hedge_delay()
+        if hedge_after is not None and hedge_after < deadline:
+            done, _ = wait(futures, timeout=hedge_after)
+            if not done:
+                futures.append(_executor.submit(fn, *args))
+        result = _first_result(futures, started, deadline)
+    except Exception:
+        breaker.record_failure()
+        raise
+
+    elapsed = time.monotonic() - started
+    latency.record(elapsed)
+    breaker.record_success(elapsed)
+    return result
+
+
+def health():
+    return {
+        'breaker': breaker.snapshot(),
+        'latency': latency.snapshot(),
+        'deadline_seconds': deadline_seconds(),
+    }
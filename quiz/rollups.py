@@ -0,0 +1,142 @@
+from datetime import date, timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Sum, Value
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from .models import LeaderboardRollup, PointsEntry, QuizAttempt
+
+# Every completed attempt appends a PointsEntry to the ledger and adds its
+# points to one LeaderboardRollup row per (period, category, user), with
+# category NULL for the overall board. Leaderboard pages read only rollups,
+# so each request is an indexed top-N over a single (period, start,
+# category) partition. The ledger is the source of truth: rebuild()
+# recomputes every rollup from it.
+
+PERIODS = ['week', 'month', 'all']
+ALL_TIME_START = date(2000, 1, 1)
+
+
+def period_start(period, day):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return ALL_TIME_START
+
+
+def _add(period, start, category_id, user_id, points):
+    rows = LeaderboardRollup.objects.filter(
+        period=period, period_start=start, category_id=category_id, user_id=user_id,
+    )
+    changes = {'points': F('points') + points, 'quizzes': F('quizzes') + 1}
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            LeaderboardRollup.objects.create(
+                period=period, period_start=start, category_id=category_id, user_id=user_id,
+                points=points, quizzes=1,
+            )
+    except IntegrityError:
+        rows.update(**changes)
+
+
+def record(attempt, points):
+    # Called inside the transaction that completes the attempt.
+    category_id = attempt.quiz.subcategory.category_id
+    PointsEntry.objects.create(
+        user_id=attempt.user_id,
+        attempt=attempt,
+        category_id=category_id,
+        points=points,
+        created_at=attempt.completed_at,
+    )
+    day = timezone.localdate(attempt.completed_at)
+    for period in PERIODS:
+        start = period_start(period, day)
+        _add(period, start, None, attempt.user_id, points)
+        _add(period, start, category_id, attempt.user_id, points)
+
+
+def _board(period, category_id, day):
+    return LeaderboardRollup.objects.filter(
+        period=period,
+        period_start=period_start(period, day or timezone.localdate()),
+        category_id=category_id,
+    )
+
+
+def top(period, category_id=None, limit=10, day=None):
+    rows = _board(period, category_id, day).filter(points__gt=0).select_related('user').order_by('-points', 'user_id')[:limit]
+    players = []
+    for position, row in enumerate(rows, 1):
+        rank = players[-1]['rank'] if players and players[-1]['points'] == row.points else position
+        players.append({
+            'rank': rank,
+            'user_id': row.user_id,
+            'username': row.user.username,
+            'points': row.points,
+            'quizzes': row.quizzes,
+        })
+    return players
+
+
+def standing(period, user_id, category_id=None, day=None):
+    board = _board(period, category_id, day)
+    row = board.filter(user_id=user_id).values('points', 'quizzes').first()
+    if not row or row['points'] <= 0:
+        return None
+    row['rank'] = board.filter(points__gt=row['points']).count() + 1
+    return row
+
+
+def backfill_ledger(batch_size=1000):
+    # Ledger entries for attempts completed before the ledger existed.
+    from .scoring import POINTS_PER_CORRECT
+    attempts = QuizAttempt.objects.filter(
+        status='completed', points_entry__isnull=True,
+    ).select_related('quiz__subcategory')
+    entries = [
+        PointsEntry(
+            user_id=attempt.user_id,
+            attempt=attempt,
+            category_id=attempt.quiz.subcategory.category_id,
+            points=attempt.score * POINTS_PER_CORRECT.get(attempt.quiz.difficulty, 20),
+            created_at=attempt.completed_at or attempt.started_at,
+        )
+        for attempt in attempts.iterator(chunk_size=batch_size)
+    ]
+    PointsEntry.objects.bulk_create(entries, batch_size=batch_size)
+    return len(entries)
+
+
+def rebuild(batch_size=1000):
+    starts = {
+        'week': TruncWeek('created_at', output_field=DateField()),
+        'month': TruncMonth('created_at', output_field=DateField()),
+        'all': Value(ALL_TIME_START, output_field=DateField()),
+    }
+    rollups = []
+    for period, start in starts.items():
+        for group in (['user_id'], ['user_id', 'category_id']):
+            entries = PointsEntry.objects.all()
+            if 'category_id' in group:
+                entries = entries.filter(category__isnull=False)
+            rows = entries.annotate(start=start).values('start', *group).annotate(
+                total=Sum('points'), count=Count('id'),
+            )
+            rollups.extend(
+                LeaderboardRollup(
+                    period=period,
+                    period_start=row['start'],
+                    category_id=row.get('category_id'),
+                    user_id=row['user_id'],
+                    points=row['total'],
+                    quizzes=row['count'],
+                )
+                for row in rows
+            )
+    with transaction.atomic():
+        LeaderboardRollup.objects.all().delete()
+        LeaderboardRollup.objects.bulk_create(rollups, batch_size=batch_size)
+    return len(rollups)
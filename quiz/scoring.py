@@ -0,0 +1,114 @@
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .models import QuizAttempt
+from . import leaderboard, rollups, snapshots, user_stats
+from .signals import points_changed
+
+POINTS_PER_CORRECT = {'easy': 10, 'medium': 15, 'hard': 20}
+COMPLETE_RETRIES = 3
+
+
+def grace_seconds():
+    return getattr(settings, 'QUIZ_TIMER_GRACE_SECONDS', 5)
+
+
+def answer_cutoff():
+    # Answers are accepted until expires_at plus a small grace period that
+    # covers the final autosave racing the client-side timer.
+    return timezone.now() - timedelta(seconds=grace_seconds())
+
+
+def is_expired(attempt):
+    return attempt.status == 'in_progress' and attempt.expires_at is not None and attempt.expires_at < answer_cutoff()
+
+
+def expired_attempts():
+    return QuizAttempt.objects.filter(status='in_progress', expires_at__lt=answer_cutoff())
+
+
+def complete_attempt(attempt):
+    # Scores and completes the attempt with an optimistic UPDATE guarded by
+    # the version column, retrying when an autosave lands in between. Returns
+    # True only for the caller that made the transition, so points are
+    # awarded exactly once.
+    for _ in range(COMPLETE_RETRIES):
+        if attempt.status == 'completed':
+            return False
+        completed_at = timezone.now()
+        if attempt.expires_at and attempt.expires_at < completed_at:
+            completed_at = attempt.expires_at
+        # The version guard also pins the snapshot to the answers it was
+        # built from: any write in between fails the update and we rebuild.
+        results = snapshots.build(attempt, completed_at)
+        correct_count = results['score']
+        with transaction.atomic():
+            completed = QuizAttempt.objects.filter(
+                id=attempt.id, status='in_progress', version=attempt.version
+            ).update(
+                score=correct_count,
+                status='completed',
+                completed_at=completed_at,
+                results=results,
+                version=F('version') + 1,
+            )
+            if completed:
+                attempt.score = correct_count
+                attempt.status = 'completed'
+                attempt.completed_at = completed_at
+                attempt.results = results
+                attempt.version += 1
+                award_points(attempt)
+                transaction.on_commit(leaderboard.invalidate)
+                return True
+        attempt.refresh_from_db(fields=['status', 'version'])
+    return False
+
+
+def award_points(attempt):
+    # Streaks depend on the last quiz date so they are computed from the row
+    # as read; the running totals are applied with F() so concurrent
+    # completions for the same user never lose an increment.
+    from accounts.models import UserProfile
+    profile, created = UserProfile.objects.get_or_create(user_id=attempt.user_id)
+    today = date.today()
+    
+    current_streak = profile.current_streak
+    if profile.last_quiz_date:
+        days_diff = (today - profile.last_quiz_date).days
+        if days_diff == 0:
+            pass
+        elif days_diff == 1:
+            current_streak += 1
+        else:
+            current_streak = 1
+    else:
+        current_streak = 1
+    
+    points_earned = attempt.score * POINTS_PER_CORRECT.get(attempt.quiz.difficulty, 20)
+    UserProfile.objects.filter(id=profile.id).update(
+        total_points=F('total_points') + points_earned,
+        current_streak=current_streak,
+        longest_streak=Greatest(F('longest_streak'), current_streak),
+        last_quiz_date=today,
+        updated_at=timezone.now(),
+        **user_stats.completion_changes(attempt),
+    )
+    points_changed.send(
+        sender=UserProfile,
+        user_id=attempt.user_id,
+        old_points=profile.total_points,
+        new_points=profile.total_points + points_earned,
+    )
+    rollups.record(attempt, points_earned)
+
+
+def sweep_expired_attempts(batch_size=500):
+    completed = 0
+    for attempt in expired_attempts().select_related('quiz__subcategory')[:batch_size]:
+        if complete_attempt(attempt):
+            completed += 1
+    return completed
@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+from accounts.models import UserProfile
+from .models import Category, Subcategory
+from . import catalog, rank_index
+
+# Sent when total_points changes through a queryset update(), which bypasses
+# post_save. Arguments: user_id, old_points, new_points.
+points_changed = Signal()
+
+
+def _move_after_commit(old_points, new_points):
+    if rank_index.enabled() and old_points != new_points:
+        transaction.on_commit(lambda: rank_index.index.move(old_points, new_points))
+
+
+@receiver(post_init, sender=UserProfile)
+def remember_loaded_points(sender, instance, **kwargs):
+    instance._loaded_total_points = instance.__dict__.get('total_points')
+
+
+@receiver(post_save, sender=UserProfile)
+def track_saved_points(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'total_points' not in update_fields:
+        return
+    old_points = 0 if created else instance._loaded_total_points
+    if old_points is not None:
+        _move_after_commit(old_points, instance.total_points)
+    instance._loaded_total_points = instance.total_points
+
+
+@receiver(post_delete, sender=UserProfile)
+def track_deleted_points(sender, instance, **kwargs):
+    _move_after_commit(instance.total_points, 0)
+
+
+@receiver(points_changed)
+def track_awarded_points(sender, old_points, new_points, **kwargs):
+    _move_after_commit(old_points, new_points)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Subcategory)
+@receiver(post_delete, sender=Subcategory)
+def invalidate_catalog(sender, **kwargs):
+    transaction.on_commit(catalog.invalidate)
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import GenerationFlight
+from .openai_service import generate_quiz_questions
+
+# Identical generation requests that arrive while one is already running wait
+# for its result instead of issuing their own call. The flight rows live in
+# the database, so coalescing works across worker processes and hosts.
+
+
+def single_flight_enabled():
+    return getattr(settings, 'SINGLE_FLIGHT_ENABLED', True)
+
+
+def lease_seconds():
+    return getattr(settings, 'SINGLE_FLIGHT_LEASE', 60)
+
+
+def wait_timeout():
+    return getattr(settings, 'SINGLE_FLIGHT_WAIT_TIMEOUT', 90)
+
+
+def result_ttl():
+    return getattr(settings, 'SINGLE_FLIGHT_RESULT_TTL', 5)
+
+
+def poll_interval():
+    return getattr(settings, 'SINGLE_FLIGHT_POLL_INTERVAL', 0.25)
+
+
+def flight_key(*parts):
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def _lookup(key):
+    return GenerationFlight.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+
+
+def _claim(key):
+    now = timezone.now()
+    GenerationFlight.objects.filter(expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            GenerationFlight.objects.create(key=key, expires_at=now + timedelta(seconds=lease_seconds()))
+    except IntegrityError:
+        return False
+    return True
+
+
+def _lead(key, fn):
+    try:
+        result = fn()
+    except Exception:
+        GenerationFlight.objects.filter(key=key).delete()
+        raise
+
+    if not result:
+        # Let the next caller retry rather than sharing an empty result.
+        GenerationFlight.objects.filter(key=key).delete()
+        return result
+
+    GenerationFlight.objects.filter(key=key).update(
+        status='done',
+        result=result,
+        expires_at=timezone.now() + timedelta(seconds=result_ttl()),
+    )
+    return result
+
+
+def run(key, fn):
+    deadline = time.monotonic() + wait_timeout()
+    while True:
+        flight = _lookup(key)
+        if flight is None:
+            if _claim(key):
+                return _lead(key, fn)
+            continue
+        if flight.status == 'done':
+            return flight.result
+        if time.monotonic() >= deadline:
+            logging.warning(f"Timed out waiting for in-flight generation {key[:12]}, generating directly")
+            return fn()
+        time.sleep(poll_interval())
+
+
+def generate_quiz_questions_coalesced(subcategory_name, difficulty, num_questions=10):
+    def generate():
+        return generate_quiz_questions(subcategory_name, difficulty, num_questions)
+
+    if not single_flight_enabled():
+        return generate()
+    return run(flight_key('generate_quiz_questions', subcategory_name, difficulty, num_questions), generate)
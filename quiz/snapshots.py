@@ -0,0 +1,56 @@
+from .models import Question, QuizAttempt, UserAnswer
+
+# A completed attempt never changes, so scoring writes everything the results
+# pages need into QuizAttempt.results once. Bump SNAPSHOT_VERSION when the
+# layout changes; older snapshots are rebuilt on first view, and the version
+# is part of the results page cache key.
+
+SNAPSHOT_VERSION = 1
+
+
+def build(attempt, completed_at=None):
+    questions = Question.objects.filter(quiz_id=attempt.quiz_id).order_by('order').values(
+        'id', 'question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer', 'explanation',
+    )
+    answers = dict(UserAnswer.objects.filter(attempt_id=attempt.id).values_list('question_id', 'selected_answer'))
+
+    items = []
+    for question in questions:
+        user_answer = answers.get(question.pop('id'))
+        items.append({
+            'question': question,
+            'user_answer': user_answer,
+            'is_correct': user_answer is not None and user_answer == question['correct_answer'],
+            'explanation': question.pop('explanation'),
+        })
+
+    completed_at = completed_at or attempt.completed_at
+    score = sum(item['is_correct'] for item in items)
+    return {
+        'version': SNAPSHOT_VERSION,
+        'score': score,
+        'total_questions': attempt.total_questions,
+        'percentage': round(score / attempt.total_questions * 100) if attempt.total_questions > 0 else 0,
+        'time_taken_seconds': int((completed_at - attempt.started_at).total_seconds()) if completed_at else None,
+        'items': items,
+    }
+
+
+def for_attempt(attempt):
+    # Completed attempts from before snapshots existed get theirs on first
+    # view; in-progress attempts are built live and never stored.
+    snapshot = attempt.results
+    if snapshot and snapshot.get('version') == SNAPSHOT_VERSION:
+        return snapshot
+    snapshot = build(attempt)
+    if attempt.status == 'completed':
+        QuizAttempt.objects.filter(id=attempt.id).update(results=snapshot)
+        attempt.results = snapshot
+    return snapshot
+
+
+def time_taken(snapshot):
+    seconds = snapshot['time_taken_seconds']
+    if seconds is None:
+        return "N/A"
+    return f"{seconds // 60}m {seconds % 60}s"
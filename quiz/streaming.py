@@ -0,0 +1,80 @@
+import logging
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+from .materialize import build_question, clean_question, materialize_quiz
+from .models import Question, Quiz, QuizAttempt
+from .openai_service import stream_quiz_questions
+
+
+def streaming_enabled():
+    return getattr(settings, 'QUIZ_STREAMING_GENERATION', False)
+
+
+def stale_after():
+    return getattr(settings, 'QUIZ_STREAMING_STALE_SECONDS', 120)
+
+
+def _finalize(quiz_id, attempt_id, saved):
+    # The attempt total is written first so a reader that sees the quiz
+    # finished also sees the final question count. The deadline follows
+    # the time limit of the questions actually generated.
+    QuizAttempt.objects.filter(id=attempt_id).update(
+        total_questions=saved,
+        expires_at=F('started_at') + timedelta(seconds=saved * 60),
+    )
+    return Quiz.objects.filter(id=quiz_id, is_generating=True).update(is_generating=False, time_limit=saved * 60)
+
+
+def finalize_if_stale(attempt):
+    # A worker that died mid-stream never clears is_generating, which would
+    # leave the take page polling for questions that will not arrive. Past
+    # the cutoff the quiz is closed with the questions saved so far.
+    quiz = attempt.quiz
+    if not quiz.is_generating or timezone.now() - quiz.created_at < timedelta(seconds=stale_after()):
+        return False
+    saved = Question.objects.filter(quiz=quiz).count()
+    if not _finalize(quiz.id, attempt.id, saved):
+        return False
+    attempt.refresh_from_db(fields=['total_questions', 'expires_at'])
+    quiz.refresh_from_db(fields=['is_generating', 'time_limit'])
+    return True
+
+
+def finalize_stale_quizzes(batch_size=500):
+    cutoff = timezone.now() - timedelta(seconds=stale_after())
+    attempts = QuizAttempt.objects.filter(
+        quiz__is_generating=True, quiz__created_at__lt=cutoff,
+    ).select_related('quiz')[:batch_size]
+    return sum(finalize_if_stale(attempt) for attempt in attempts)
+
+
+def _finish_quiz(quiz, attempt_id, stream, saved):
+    try:
+        for question in stream:
+            question = clean_question(question)
+            if question:
+                build_question(quiz, question, saved).save()
+                saved += 1
+    except Exception as e:
+        logging.error(f"Streaming generation for quiz {quiz.id} stopped early: {e}")
+    finally:
+        _finalize(quiz.id, attempt_id, saved)
+        connection.close()
+
+
+def start_streamed_quiz(user, subcategory, difficulty, num_questions):
+    # Creates the quiz as soon as the first question has been parsed from the
+    # stream and hands the rest of the stream to a background thread, so the
+    # user can start answering while later questions are still generating.
+    stream = stream_quiz_questions(subcategory.name, difficulty, num_questions)
+    first = next((q for q in stream if clean_question(q)), None)
+    if first is None:
+        return None
+
+    attempt = materialize_quiz(user, subcategory, difficulty, [first], total_questions=num_questions, is_generating=True)
+    threading.Thread(target=_finish_quiz, args=(attempt.quiz, attempt.id, stream, 1), daemon=True).start()
+    return attempt
@@ -1,3 +1,903 @@
-from django.test import TestCase
+import json
+import re
+import time
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from . import catalog, generation_cache, leaderboard, openai_service, pagination, percentiles, question_pool, rank_index, resilience, rollups, scoring, single_flight, snapshots, streaming, user_stats
+from .answers import record_answers
+from .generator_backends import HttpStubGenerator, LocalCorpusGenerator
+from .materialize import materialize_quiz
+from .models import Category, Subcategory, Quiz, QuizAttempt, UserAnswer, GenerationFlight, LeaderboardRollup
 
-# Create your tests here.
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        self.calls = 0
+
+    def generate(self):
+        self.calls += 1
+        return [{'question': f'call {self.calls}'}]
+
+    def test_leader_result_is_shared_within_ttl(self):
+        first = single_flight.run('k', self.generate)
+        second = single_flight.run('k', self.generate)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first, second)
+
+    def test_waiter_receives_result_of_completed_flight(self):
+        GenerationFlight.objects.create(
+            key='k', status='done', result=[{'question': 'shared'}],
+            expires_at=timezone.now() + timedelta(seconds=5),
+        )
+        self.assertEqual(single_flight.run('k', self.generate), [{'question': 'shared'}])
+        self.assertEqual(self.calls, 0)
+
+    def test_expired_flight_is_reclaimed(self):
+        GenerationFlight.objects.create(key='k', expires_at=timezone.now() - timedelta(seconds=1))
+        single_flight.run('k', self.generate)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(GenerationFlight.objects.get(key='k').status, 'done')
+
+    @override_settings(SINGLE_FLIGHT_WAIT_TIMEOUT=0)
+    def test_waiter_generates_directly_after_timeout(self):
+        GenerationFlight.objects.create(key='k', expires_at=timezone.now() + timedelta(seconds=60))
+        single_flight.run('k', self.generate)
+        self.assertEqual(self.calls, 1)
+
+    def test_failed_leader_releases_flight(self):
+        single_flight.run('k', lambda: [])
+        self.assertFalse(GenerationFlight.objects.filter(key='k').exists())
+
+
+@override_settings(QUIZ_BREAKER_FAILURE_THRESHOLD=2, QUIZ_BREAKER_RESET_TIMEOUT=0, QUIZ_BREAKER_SLOW_CALL_SECONDS=1)
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        self.breaker = resilience.CircuitBreaker()
+    
+    def tearDown(self):
+        resilience.breaker.record_success(0)
+
+    def test_opens_after_threshold_and_allows_one_trial(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_success(0.1)
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_slow_calls_count_as_failures(self):
+        self.breaker.record_success(5)
+        self.breaker.record_success(5)
+        self.assertEqual(self.breaker.state, 'open')
+
+    @override_settings(QUIZ_GENERATOR_DEADLINE=0.05)
+    def test_guarded_call_enforces_deadline(self):
+        with self.assertRaises(resilience.GeneratorTimeout):
+            resilience.guarded_call(time.sleep, 0.5)
+
+    @override_settings(QUIZ_GENERATOR_DEADLINE=0.2)
+    def test_stub_backend_times_out_at_deadline(self):
+        with mock.patch('urllib.request.urlopen') as urlopen:
+            urlopen.return_value.__enter__.return_value.read.return_value = b'{"questions": []}'
+            HttpStubGenerator().generate_content('prompt', 'Physics', 'easy', 5)
+        self.assertEqual(urlopen.call_args.kwargs['timeout'], 0.2)
+
+
+class ChunkedCorpusGenerator(LocalCorpusGenerator):
+    # Streams the local corpus document a few characters at a time, after an
+    # optional delay before each chunk.
+    chunk_size = 7
+    delay = 0
+
+    def stream_content(self, prompt, subcategory_name, difficulty, num_questions):
+        text = self.generate_content(prompt, subcategory_name, difficulty, num_questions)
+        for start in range(0, len(text), self.chunk_size):
+            time.sleep(self.delay)
+            yield text[start:start + self.chunk_size]
+
+
+class StreamBreakerTests(TestCase):
+    def setUp(self):
+        self.generator = ChunkedCorpusGenerator()
+        patcher = mock.patch.object(openai_service, 'get_generator', return_value=self.generator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(resilience.breaker.record_success, 0)
+        resilience.breaker.state = resilience.breaker.HALF_OPEN
+        resilience.breaker.trial_in_flight = False
+
+    def test_oversized_stream_settles_half_open_trial(self):
+        original = self.generator.generate_content
+        self.generator.generate_content = lambda prompt, name, difficulty, n: original(prompt, name, difficulty, 5)
+        questions = list(openai_service.stream_quiz_questions('Physics', 'easy', 3))
+        self.assertEqual(len(questions), 3)
+        self.assertEqual(resilience.breaker.state, 'closed')
+
+    def test_abandoned_stream_settles_half_open_trial(self):
+        stream = openai_service.stream_quiz_questions('Physics', 'easy', 5)
+        next(stream)
+        stream.close()
+        self.assertEqual(resilience.breaker.state, 'closed')
+        self.assertTrue(resilience.breaker.allow())
+
+    @override_settings(QUIZ_BREAKER_SLOW_CALL_SECONDS=0.05)
+    def test_long_stream_with_fast_first_chunk_is_not_slow(self):
+        self.generator.delay = 0.001
+        self.assertEqual(len(list(openai_service.stream_quiz_questions('Physics', 'easy', 20))), 20)
+        self.assertEqual(resilience.breaker.state, 'closed')
+
+
+class QuestionStreamParserTests(TestCase):
+    document = json.dumps({'note': 'ignored [', 'questions': [
+        {'question': 'Which brace closes {this}?', 'option_a': '}', 'correct_answer': 'A'},
+        {'question': 'Escaped "quotes" and ] brackets', 'option_a': '[', 'correct_answer': 'B'},
+        {'question': 'Last', 'option_a': 'x', 'correct_answer': 'C'},
+    ]}, indent=2)
+
+    def test_any_chunk_boundaries_yield_the_same_questions(self):
+        expected = json.loads(self.document)['questions']
+        for size in range(1, len(self.document) + 1):
+            parser = openai_service.QuestionStreamParser()
+            questions = []
+            for start in range(0, len(self.document), size):
+                questions.extend(parser.feed(self.document[start:start + size]))
+            self.assertEqual(questions, expected, f'chunk size {size}')
+            self.assertTrue(parser.finished)
+
+    def test_questions_are_emitted_as_soon_as_complete(self):
+        parser = openai_service.QuestionStreamParser()
+        end = self.document.index('Escaped')
+        self.assertEqual(len(parser.feed(self.document[:end])), 1)
+        self.assertEqual(len(parser.feed(self.document[end:])), 2)
+
+
+@override_settings(QUIZ_STREAMING_GENERATION=True)
+class StreamedQuizTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='pass12345')
+        category = Category.objects.create(name='Academic')
+        self.subcategory = Subcategory.objects.create(name='Physics', category=category)
+        patcher = mock.patch.object(openai_service, 'get_generator', return_value=ChunkedCorpusGenerator())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # The background thread is started by hand so it shares the test
+        # transaction, and must not close the test connection.
+        for name in ('threading', 'connection'):
+            patcher = mock.patch.object(streaming, name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client.force_login(self.user)
+
+    def feed(self, attempt, after=0):
+        return self.client.get(reverse('quiz:question_feed', args=[attempt.id]), {'after': after}).json()
+
+    def test_quiz_opens_on_first_question_and_fills_in(self):
+        attempt = streaming.start_streamed_quiz(self.user, self.subcategory, 'easy', 5)
+        data = self.feed(attempt)
+        self.assertEqual((len(data['questions']), data['generating'], data['total']), (1, True, 5))
+
+        target = streaming.threading.Thread.call_args.kwargs
+        target['target'](*target['args'])
+        data = self.feed(attempt, after=1)
+        self.assertEqual([q['order'] for q in data['questions']], [1, 2, 3, 4])
+        self.assertEqual((data['generating'], data['total']), (False, 5))
+
+    def test_stalled_stream_is_closed_with_the_questions_saved(self):
+        attempt = streaming.start_streamed_quiz(self.user, self.subcategory, 'easy', 5)
+        self.assertTrue(self.feed(attempt)['generating'])
+
+        Quiz.objects.filter(id=attempt.quiz_id).update(created_at=timezone.now() - timedelta(seconds=121))
+        data = self.feed(attempt)
+        self.assertEqual((len(data['questions']), data['generating'], data['total']), (1, False, 1))
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.expires_at, attempt.started_at + timedelta(seconds=60))
+
+    def test_sweeper_closes_stalled_streams(self):
+        attempt = streaming.start_streamed_quiz(self.user, self.subcategory, 'easy', 5)
+        self.assertEqual(streaming.finalize_stale_quizzes(), 0)
+        Quiz.objects.filter(id=attempt.quiz_id).update(created_at=timezone.now() - timedelta(seconds=121))
+        self.assertEqual(streaming.finalize_stale_quizzes(), 1)
+        self.assertFalse(Quiz.objects.get(id=attempt.quiz_id).is_generating)
+        self.assertEqual(QuizAttempt.objects.get(id=attempt.id).total_questions, 1)
+
+
+class GenerationCacheTests(TestCase):
+    def setUp(self):
+        generation_cache._cache().clear()
+        self.question = {
+            'question': 'Which is heaviest?',
+            'option_a': 'Feather', 'option_b': 'Lead', 'option_c': 'Paper', 'option_d': 'Air',
+            'correct_answer': 'b',
+        }
+
+    def test_shuffle_remaps_correct_answer(self):
+        for _ in range(50):
+            shuffled = generation_cache.shuffle_options(self.question)
+            self.assertEqual(shuffled[f"option_{shuffled['correct_answer'].lower()}"], 'Lead')
+            self.assertEqual(sorted(shuffled[f'option_{l}'] for l in 'abcd'), ['Air', 'Feather', 'Lead', 'Paper'])
+        self.assertEqual(self.question['correct_answer'], 'b')
+
+    def test_shuffle_leaves_unknown_answers_alone(self):
+        question = dict(self.question, correct_answer='E')
+        self.assertEqual(generation_cache.shuffle_options(question), question)
+
+    def test_sample_is_a_subset_capped_at_available(self):
+        questions = make_questions(6)
+        picked = generation_cache.sample(questions, 4)
+        self.assertEqual(len({q['question'] for q in picked}), 4)
+        self.assertTrue(all(q in questions for q in picked))
+        self.assertEqual(len(generation_cache.sample(questions, 10, reshuffle=True)), 6)
+
+    @override_settings(QUIZ_GENERATION_CACHE_OVERSAMPLE=1.5)
+    def test_oversampling(self):
+        self.assertEqual(generation_cache.oversampled(10), 15)
+        self.assertEqual(generation_cache.oversampled(1), 2)
+        with self.settings(QUIZ_GENERATION_CACHE_ENABLED=False):
+            self.assertEqual(generation_cache.oversampled(10), 10)
+
+    @override_settings(QUIZ_GENERATION_CACHE_OVERSAMPLE=1.5)
+    def test_hit_serves_a_subset_of_the_oversampled_response(self):
+        generator = LocalCorpusGenerator()
+        with mock.patch.object(openai_service, 'get_generator', return_value=generator), \
+                mock.patch.object(generator, 'generate_content', wraps=generator.generate_content) as generate:
+            first = openai_service._request_questions('Physics', 'easy', 10)
+            second = openai_service._request_questions('Physics', 'easy', 10)
+        self.assertEqual(generate.call_args.args[3], 15)
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual((len(first), len(second)), (10, 10))
+        stored = {q['question']: q for q in json.loads(generator.generate_content(*generate.call_args.args))['questions']}
+        for question in second:
+            original = stored[question['question']]
+            self.assertEqual(question[f"option_{question['correct_answer'].lower()}"],
+                             original[f"option_{original['correct_answer'].lower()}"])
+        self.assertEqual(generation_cache.stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_lookup_counts_hits_and_misses(self):
+        self.assertIsNone(generation_cache.lookup('quiz-generation:missing'))
+        generation_cache.store('quiz-generation:present', make_questions(2))
+        generation_cache.lookup('quiz-generation:present')
+        generation_cache.lookup('quiz-generation:present')
+        self.assertEqual(generation_cache.stats(), {'hits': 2, 'misses': 1, 'hit_rate': 0.6667})
+        with self.settings(QUIZ_GENERATION_CACHE_ENABLED=False):
+            self.assertIsNone(generation_cache.lookup('quiz-generation:present'))
+        self.assertEqual(generation_cache.stats()['hits'], 2)
+
+
+class FlakyCorpusGenerator(LocalCorpusGenerator):
+    # Fails every request for the given chunk of a chunked quiz.
+    failing_part = None
+
+    def generate_content(self, prompt, subcategory_name, difficulty, num_questions):
+        if self.failing_part and f'part {self.failing_part} of' in prompt:
+            raise RuntimeError('chunk failed')
+        return super().generate_content(prompt, subcategory_name, difficulty, num_questions)
+
+
+class ChunkedGenerationTests(TestCase):
+    def setUp(self):
+        self.generator = FlakyCorpusGenerator()
+        patcher = mock.patch.object(openai_service, 'get_generator', return_value=self.generator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(self.generator, 'generate_content', wraps=self.generator.generate_content)
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(resilience.breaker.record_success, 0)
+
+    def requested(self):
+        return [c.args[3] for c in self.generate.call_args_list]
+
+    def generate_chunked(self, num_questions, chunk_size=5):
+        return openai_service._generate_chunked('Physics', 'easy', num_questions, chunk_size, 4, use_cache=False)
+
+    def test_splits_into_chunks_with_distinct_focus(self):
+        questions = self.generate_chunked(12)
+        self.assertEqual(sorted(self.requested()), [2, 5, 5])
+        self.assertEqual(len(openai_service.dedupe_questions(questions)), 12)
+        parts = sorted(re.search(r'part (\d) of 3', c.args[0]).group(1) for c in self.generate.call_args_list)
+        self.assertEqual(parts, ['1', '2', '3'])
+
+    def test_dedupe_normalises_question_text(self):
+        questions = make_questions(2) + [{'question': 'question 0'}, {'question': '  QUESTION 1!! '}, {'question': ''}]
+        self.assertEqual([q['question'] for q in openai_service.dedupe_questions(questions)], ['Question 0?', 'Question 1?'])
+
+    def test_duplicates_across_chunks_are_topped_up(self):
+        self.generator.corpus = {'Physics': {'easy': make_questions(7)}}
+        questions = self.generate_chunked(10)
+        # Two chunks of five from a corpus of seven must overlap.
+        requested = self.requested()
+        self.assertEqual(requested[:2], [5, 5])
+        self.assertEqual(len(requested), 3)
+        self.assertGreaterEqual(requested[2], 3)
+        self.assertEqual(len(openai_service.dedupe_questions(questions)), len(questions))
+        self.assertLessEqual(len(questions), 7)
+
+    def test_failed_chunk_is_made_up_by_top_up(self):
+        self.generator.failing_part = 2
+        questions = self.generate_chunked(12)
+        # Chunks run concurrently; the top-up for the failed one comes last.
+        requested = self.requested()
+        self.assertEqual((sorted(requested[:3]), requested[3:]), ([2, 5, 5], [5]))
+        self.assertEqual(len(questions), 12)
+
+    def test_all_chunks_failing_falls_back(self):
+        self.generator.generate_content = mock.Mock(side_effect=RuntimeError('down'))
+        with self.assertRaises(RuntimeError):
+            self.generate_chunked(12)
+        with self.settings(QUIZ_GENERATION_CHUNK_SIZE=5), \
+                mock.patch.object(openai_service, 'stored_or_fallback_questions', return_value=['fallback']):
+            self.assertEqual(openai_service.generate_quiz_questions('Physics', 'easy', 12, use_cache=False), ['fallback'])
+
+
+def make_questions(count):
+    return [{
+        'question': f'Question {i}?',
+        'option_a': 'A', 'option_b': 'B', 'option_c': 'C', 'option_d': 'D',
+        'correct_answer': 'b',
+        'explanation': 'Because.',
+    } for i in range(count)]
+
+
+class MaterializeQuizTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='pass12345')
+        category = Category.objects.create(name='Academic')
+        self.subcategory = Subcategory.objects.create(name='Physics', category=category)
+
+    def test_builds_quiz_questions_and_attempt(self):
+        attempt = materialize_quiz(self.user, self.subcategory, 'easy', make_questions(3) + [{'question': 'broken'}])
+        self.assertEqual(attempt.total_questions, 3)
+        self.assertEqual(attempt.quiz.time_limit, 180)
+        self.assertEqual(list(attempt.quiz.questions.values_list('order', 'correct_answer')),
+                         [(0, 'B'), (1, 'B'), (2, 'B')])
+
+    def test_rejects_payload_without_valid_questions(self):
+        self.assertIsNone(materialize_quiz(self.user, self.subcategory, 'easy', [{'question': 'broken'}]))
+        self.assertFalse(Quiz.objects.exists())
+
+    def test_query_count_is_independent_of_question_count(self):
+        for count in (5, 20):
+            QuizAttempt.objects.all().delete()
+            with self.assertNumQueries(7):
+                materialize_quiz(self.user, self.subcategory, 'easy', make_questions(count))
+
+    def test_query_count_is_independent_of_stale_attempt_count(self):
+        quiz = materialize_quiz(self.user, self.subcategory, 'easy', make_questions(2)).quiz
+        for stale in (1, 4):
+            for _ in range(stale):
+                attempt = QuizAttempt.objects.create(user=self.user, quiz=quiz, total_questions=2)
+                UserAnswer.objects.create(attempt=attempt, question=quiz.questions.first(), selected_answer='A')
+            with self.assertNumQueries(9):
+                materialize_quiz(self.user, self.subcategory, 'easy', make_questions(10))
+            self.assertEqual(QuizAttempt.objects.filter(user=self.user, status='in_progress').count(), 1)
+
+
+class QuestionPoolTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='pass12345')
+        category = Category.objects.create(name='Academic')
+        self.subcategory = Subcategory.objects.create(name='Physics', category=category)
+
+    def fill(self, count):
+        question_pool.add_questions(self.subcategory, 'easy', make_questions(count))
+
+    def test_take_is_all_or_nothing(self):
+        self.fill(3)
+        self.assertEqual(question_pool.take_questions(self.subcategory, 'easy', 5), [])
+        self.assertEqual(question_pool.pool_depth(self.subcategory, 'easy'), 3)
+        self.assertEqual(len(question_pool.take_questions(self.subcategory, 'easy', 3)), 3)
+        self.assertEqual(question_pool.pool_depth(self.subcategory, 'easy'), 0)
+
+    def test_failed_materialise_returns_rows_to_pool(self):
+        self.fill(5)
+        with mock.patch.object(question_pool, 'materialize_quiz', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                question_pool.start_pooled_quiz(self.user, self.subcategory, 'easy', 5)
+        self.assertEqual(question_pool.pool_depth(self.subcategory, 'easy'), 5)
+        attempt = question_pool.start_pooled_quiz(self.user, self.subcategory, 'easy', 5)
+        self.assertEqual(attempt.total_questions, 5)
+        self.assertEqual(question_pool.pool_depth(self.subcategory, 'easy'), 0)
+
+    @override_settings(QUESTION_POOL_LOW_WATERMARK=4, QUESTION_POOL_HIGH_WATERMARK=10)
+    def test_refill_tops_up_to_high_watermark_below_low(self):
+        generate = mock.Mock(side_effect=lambda name, difficulty, n, **kwargs: make_questions(n))
+        with mock.patch.object(question_pool, 'generate_quiz_questions', generate):
+            self.fill(4)
+            self.assertEqual(question_pool.refill(self.subcategory, 'easy', batch_size=4), 0)
+            generate.assert_not_called()
+
+            question_pool.take_questions(self.subcategory, 'easy', 1)
+            self.assertEqual(question_pool.refill(self.subcategory, 'easy', batch_size=4), 7)
+        self.assertEqual([c.args[2] for c in generate.call_args_list], [4, 3])
+        self.assertEqual(question_pool.pool_depth(self.subcategory, 'easy'), 10)
+
+    @override_settings(QUESTION_POOL_LOW_WATERMARK=4, QUESTION_POOL_HIGH_WATERMARK=10)
+    def test_refill_stops_when_generator_returns_nothing(self):
+        with mock.patch.object(question_pool, 'generate_quiz_questions', return_value=[]) as generate:
+            self.assertEqual(question_pool.refill(self.subcategory, 'easy'), 0)
+        self.assertEqual(generate.call_count, 1)
+
+
+class AnswerRecordingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='pass12345')
+        category = Category.objects.create(name='Academic')
+        subcategory = Subcategory.objects.create(name='Physics', category=category)
+        self.attempt = materialize_quiz(self.user, subcategory, 'easy', make_questions(3))
+        self.questions = list(self.attempt.quiz.questions.order_by('order'))
+        self.client.force_login(self.user)
+
+    def post_answer(self, question, selected):
+        return self.client.post(
+            reverse('quiz:answer', args=[self.attempt.id]),
+            {'question_id': question.id, 'answer': selected, 'current_question': 1},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+
+    def test_answer_upserts_and_bumps_version(self):
+        self.post_answer(self.questions[0], 'A')
+        self.post_answer(self.questions[0], 'B')
+        answer = UserAnswer.objects.get(attempt=self.attempt)
+        self.assertEqual((answer.selected_answer, answer.is_correct), ('B', True))
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.current_question, self.attempt.version), (1, 2))
+
+    def test_record_answers_is_one_query(self):
+        with self.assertNumQueries(1):
+            written = record_answers(self.attempt.id, self.user.id, {q.id: 'B' for q in self.questions})
+        self.assertEqual(written, 3)
+
+    def test_answers_to_completed_or_foreign_attempts_are_ignored(self):
+        other = User.objects.create_user(username='other', password='pass12345')
+        self.assertEqual(record_answers(self.attempt.id, other.id, {self.questions[0].id: 'B'}), 0)
+        QuizAttempt.objects.filter(id=self.attempt.id).update(status='completed')
+        response = self.post_answer(self.questions[0], 'B')
+        self.assertEqual(response.json(), {'status': 'completed'})
+        self.assertFalse(UserAnswer.objects.exists())
+
+    def test_double_submit_awards_points_once(self):
+        self.post_answer(self.questions[0], 'B')
+        url = reverse('quiz:submit', args=[self.attempt.id])
+        self.client.post(url)
+        self.client.post(url)
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.status, self.attempt.score), ('completed', 1))
+        self.assertEqual(self.user.profile.total_points, 10)
+
+    def save(self, body):
+        return self.client.post(
+            reverse('quiz:save_answers', args=[self.attempt.id]),
+            body if isinstance(body, str) else json.dumps(body),
+            content_type='application/json',
+        )
+
+    def test_save_answers_writes_batch_and_progress(self):
+        response = self.save({'answers': {q.id: 'b' for q in self.questions[:2]}, 'current_question': 2})
+        self.assertEqual(response.json(), {'status': 'saved', 'saved': 2})
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.current_question, self.attempt.version), (2, 1))
+
+    def test_save_answers_rejects_malformed_payloads(self):
+        for body in ('not json', '[1, 2]', '"answers"', {'answers': [['1', 'B']]}, {'answers': 'B'},
+                     {'current_question': 'next'}, {'current_question': [1]}):
+            response = self.save(body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertEqual(response.json(), {'error': 'Invalid payload'})
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.version, 0)
+        self.assertFalse(UserAnswer.objects.exists())
+
+    def test_save_answers_to_foreign_attempt_is_forbidden(self):
+        other = User.objects.create_user(username='other', password='pass12345')
+        self.client.force_login(other)
+        response = self.save({'answers': {self.questions[0].id: 'B'}})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(UserAnswer.objects.exists())
+
+    def test_save_answers_after_completion_reports_completed(self):
+        QuizAttempt.objects.filter(id=self.attempt.id).update(status='completed')
+        self.assertEqual(self.save({'answers': {self.questions[0].id: 'B'}}).json(), {'status': 'completed'})
+        self.assertFalse(UserAnswer.objects.exists())
+
+    def test_save_answers_after_deadline_completes_attempt(self):
+        QuizAttempt.objects.filter(id=self.attempt.id).update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.save({'answers': {self.questions[0].id: 'B'}}).json(), {'status': 'completed'})
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, 'completed')
+        self.assertFalse(UserAnswer.objects.exists())
+
+    def test_autosave_during_submit_is_scored(self):
+        build = snapshots.build
+        
+        def build_then_autosave(attempt, completed_at=None):
+            results = build(attempt, completed_at)
+            if not UserAnswer.objects.exists():
+                self.client.post(
+                    reverse('quiz:save_answers', args=[self.attempt.id]),
+                    json.dumps({'answers': {self.questions[0].id: 'B'}}),
+                    content_type='application/json',
+                )
+            return results
+        
+        with mock.patch.object(snapshots, 'build', build_then_autosave):
+            self.assertTrue(scoring.complete_attempt(self.attempt))
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.score, self.attempt.results['score']), (1, 1))
+
+    def test_results_render_from_snapshot(self):
+        cache.clear()
+        self.post_answer(self.questions[0], 'B')
+        self.client.post(reverse('quiz:submit', args=[self.attempt.id]))
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.results['score'], 1)
+        self.assertEqual([item['user_answer'] for item in self.attempt.results['items']], ['B', None, None])
+        self.attempt.quiz.questions.update(question_text='Edited later')
+        # Session, user with profile, and the attempt; nothing from questions or answers.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('quiz:results', args=[self.attempt.id]))
+        self.assertContains(response, 'Question 0?')
+        self.assertNotContains(response, 'Edited later')
+
+
+class AttemptDeadlineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='pass12345')
+        category = Category.objects.create(name='Academic')
+        subcategory = Subcategory.objects.create(name='Physics', category=category)
+        self.attempt = materialize_quiz(self.user, subcategory, 'medium', make_questions(3))
+        self.question = self.attempt.quiz.questions.first()
+        record_answers(self.attempt.id, self.user.id, {self.question.id: 'B'})
+        self.attempt.expires_at = timezone.now() - timedelta(minutes=1)
+        self.attempt.save()
+        self.client.force_login(self.user)
+
+    def test_deadline_follows_time_limit(self):
+        attempt = materialize_quiz(self.user, self.attempt.quiz.subcategory, 'easy', make_questions(2))
+        self.assertAlmostEqual(attempt.seconds_remaining(), 120, delta=2)
+
+    def test_answers_after_deadline_are_rejected(self):
+        self.assertEqual(record_answers(self.attempt.id, self.user.id, {self.question.id: 'A'}), 0)
+        self.assertEqual(UserAnswer.objects.get(attempt=self.attempt).selected_answer, 'B')
+
+    def test_expired_attempt_is_completed_on_access(self):
+        response = self.client.get(reverse('quiz:take', args=[self.attempt.id]))
+        self.assertRedirects(response, reverse('quiz:results', args=[self.attempt.id]))
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.status, self.attempt.score), ('completed', 1))
+        self.assertEqual(self.attempt.completed_at, self.attempt.expires_at)
+
+    def test_sweeper_completes_expired_attempts_once(self):
+        self.assertEqual(scoring.sweep_expired_attempts(), 1)
+        self.assertEqual(scoring.sweep_expired_attempts(), 0)
+        self.assertEqual(self.user.profile.total_points, 15)
+
+
+class UserStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='pass12345')
+        category = Category.objects.create(name='Academic')
+        self.subcategory = Subcategory.objects.create(name='Physics', category=category)
+        from accounts.models import UserProfile
+        self.profile = UserProfile.objects.create(user=self.user)
+
+    def complete(self, correct):
+        attempt = materialize_quiz(self.user, self.subcategory, 'easy', make_questions(4))
+        questions = attempt.quiz.questions.all()[:correct]
+        record_answers(attempt.id, self.user.id, {q.id: 'B' for q in questions})
+        scoring.complete_attempt(attempt)
+
+    def test_totals_follow_started_and_completed_attempts(self):
+        self.complete(3)
+        self.complete(1)
+        materialize_quiz(self.user, self.subcategory, 'easy', make_questions(4))
+        self.profile.refresh_from_db()
+        self.assertEqual(
+            (self.profile.completed_quizzes, self.profile.in_progress_quizzes,
+             self.profile.total_score, self.profile.total_questions_answered),
+            (2, 1, 4, 8),
+        )
+        self.assertEqual(self.profile.average_score(), 50)
+
+    def test_rebuild_repairs_drift(self):
+        self.complete(2)
+        type(self.profile).objects.update(completed_quizzes=9, total_score=0)
+        self.assertEqual(user_stats.rebuild(), 1)
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.completed_quizzes, self.profile.total_score), (1, 2))
+        self.assertEqual(user_stats.rebuild(), 0)
+
+
+@override_settings(LEADERBOARD_SIZE=3)
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        from accounts.models import UserProfile
+        self.profiles = [
+            UserProfile.objects.create(user=User.objects.create_user(username=f'player{i}'), total_points=points)
+            for i, points in enumerate([50, 40, 40, 30, 20, 0])
+        ]
+        leaderboard.invalidate()
+
+    def test_top_players_use_competition_ranking(self):
+        players = leaderboard.top_players()
+        self.assertEqual([(p['username'], p['rank']) for p in players],
+                         [('player0', 1), ('player1', 2), ('player2', 2)])
+
+    def test_rank_outside_top_n_counts_players_ahead(self):
+        self.assertEqual(leaderboard.user_rank(self.profiles[4]), 5)
+        self.assertIsNone(leaderboard.user_rank(self.profiles[5]))
+
+    def test_snapshot_is_cached_until_invalidated(self):
+        leaderboard.snapshot()
+        with self.assertNumQueries(0):
+            leaderboard.snapshot()
+        type(self.profiles[0]).objects.filter(id=self.profiles[4].id).update(total_points=100)
+        leaderboard.invalidate()
+        self.assertEqual(leaderboard.snapshot()[0]['username'], 'player4')
+
+
+class RankIndexTests(TestCase):
+    def test_fenwick_counts_players_above(self):
+        tree = rank_index.FenwickTree.from_counts({10: 2, 20: 1, 30: 3})
+        self.assertEqual([tree.count_above(p) for p in (0, 10, 25, 30)], [6, 4, 3, 0])
+        tree.add(5000, 1)
+        tree.add(10, -1)
+        self.assertEqual((tree.count_above(0), tree.count_above(30), tree.count_at(10)), (6, 1, 1))
+
+    @override_settings(LEADERBOARD_RANK_INDEX=True)
+    def test_index_follows_saves_and_awards(self):
+        from accounts.models import UserProfile
+        self.addCleanup(setattr, rank_index, 'index', rank_index.index)
+        index = rank_index.index = rank_index.RankIndex()
+        users = [User.objects.create_user(username=f'player{i}') for i in range(3)]
+        for user, points in zip(users, (10, 20, 30)):
+            UserProfile.objects.create(user=user, total_points=points)
+        self.assertEqual(index.rank(15), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = UserProfile.objects.get(user=users[0])
+            profile.total_points = 50
+            profile.save()
+        self.assertEqual(index.rank(15), 4)
+        self.assertEqual(index.rank(50), 1)
+
+        category = Category.objects.create(name='Academic')
+        subcategory = Subcategory.objects.create(name='Physics', category=category)
+        attempt = materialize_quiz(users[1], subcategory, 'hard', make_questions(3))
+        record_answers(attempt.id, users[1].id, {q.id: 'B' for q in attempt.quiz.questions.all()})
+        with self.captureOnCommitCallbacks(execute=True):
+            scoring.complete_attempt(attempt)
+        self.assertEqual(index.rank(80), 1)
+        self.assertEqual(index.tree.total, 3)
+
+
+class LeaderboardRollupTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'player{i}') for i in range(2)]
+        self.academic = Category.objects.create(name='Academic')
+        self.sports = Category.objects.create(name='Sports')
+        self.physics = Subcategory.objects.create(name='Physics', category=self.academic)
+        self.football = Subcategory.objects.create(name='Football', category=self.sports)
+        catalog.invalidate()
+
+    def complete(self, user, subcategory, correct):
+        attempt = materialize_quiz(user, subcategory, 'easy', make_questions(5))
+        questions = attempt.quiz.questions.all()[:correct]
+        record_answers(attempt.id, user.id, {q.id: 'B' for q in questions})
+        scoring.complete_attempt(attempt)
+
+    def test_boards_are_maintained_per_period_and_category(self):
+        self.complete(self.users[0], self.physics, 2)
+        self.complete(self.users[0], self.football, 1)
+        self.complete(self.users[1], self.football, 4)
+
+        overall = rollups.top('week')
+        self.assertEqual([(p['username'], p['points'], p['quizzes']) for p in overall],
+                         [('player1', 40, 1), ('player0', 30, 2)])
+        self.assertEqual([p['username'] for p in rollups.top('month', self.academic.id)], ['player0'])
+        self.assertEqual(rollups.standing('all', self.users[0].id, self.sports.id)['rank'], 2)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.complete(self.users[0], self.physics, 2)
+        self.complete(self.users[1], self.football, 3)
+        fields = ('period', 'period_start', 'category_id', 'user_id', 'points', 'quizzes')
+        incremental = sorted(LeaderboardRollup.objects.values_list(*fields), key=str)
+        self.assertEqual(rollups.rebuild(), len(incremental))
+        self.assertEqual(sorted(LeaderboardRollup.objects.values_list(*fields), key=str), incremental)
+
+    def test_leaderboard_page_reads_rollups(self):
+        self.complete(self.users[0], self.physics, 2)
+        self.client.force_login(self.users[1])
+        response = self.client.get(reverse('quiz:leaderboard'), {'period': 'month', 'category': self.academic.id})
+        self.assertContains(response, 'player0')
+
+
+@override_settings(LEADERBOARD_HISTOGRAM_RESOLUTION=100, LEADERBOARD_SIZE=3)
+class PercentileRankTests(TestCase):
+    def setUp(self):
+        from accounts.models import UserProfile
+        users = User.objects.bulk_create([User(username=f'player{i}', password='!') for i in range(2000)])
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, total_points=i) for i, user in enumerate(users)
+        ])
+        self.profiles = {p.total_points: p for p in UserProfile.objects.all()}
+        percentiles.refresh()
+        leaderboard.invalidate()
+
+    def test_percentile_error_is_bounded_by_one_bucket(self):
+        for points in (1, 250, 1000, 1500, 1990):
+            exact = 100 * leaderboard.rank_for_points(points) / 1999
+            self.assertLessEqual(abs(percentiles.top_percent(points) - exact), 1 + 1e-9)
+
+    def test_standing_is_exact_in_top_n_and_percentile_below(self):
+        self.assertEqual(leaderboard.user_standing(self.profiles[1999]), '#1')
+        self.assertEqual(leaderboard.user_standing(self.profiles[1000]), 'Top 50%')
+        self.assertEqual(leaderboard.user_standing(self.profiles[0]), 'N/A')
+
+    def test_refresh_command_refuses_a_per_process_cache(self):
+        with self.assertRaisesMessage(CommandError, 'CACHE_URL'):
+            call_command('refresh_points_histogram')
+
+
+class CatalogTests(TestCase):
+    def setUp(self):
+        from accounts.models import UserProfile
+        self.user = User.objects.create_user(username='student', password='pass12345')
+        UserProfile.objects.create(user=self.user)
+        self.academic = Category.objects.create(name='Academic')
+        Subcategory.objects.create(name='Physics', category=self.academic)
+        Subcategory.objects.create(name='History', category=self.academic)
+        Category.objects.create(name='Empty')
+        catalog.invalidate()
+        self.client.force_login(self.user)
+
+    def test_tree_is_loaded_in_one_query_with_counts(self):
+        with self.assertNumQueries(1):
+            tree = catalog.categories()
+        self.assertEqual([(c['name'], c['subcategory_count']) for c in tree], [('Academic', 2), ('Empty', 0)])
+
+    def test_warm_catalog_pages_skip_catalog_queries(self):
+        catalog.categories()
+        for url in (reverse('quiz:browse'), reverse('quiz:start'), reverse('quiz:category', args=[self.academic.id])):
+            # Session and user with profile only
+            with self.assertNumQueries(2):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_changes_invalidate_after_commit(self):
+        catalog.categories()
+        with self.captureOnCommitCallbacks(execute=True):
+            Subcategory.objects.create(name='Chemistry', category=self.academic)
+        self.assertEqual(catalog.category(self.academic.id)['subcategory_count'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.academic.delete()
+        self.assertIsNone(catalog.category(self.academic.id))
+
+    def test_local_copy_is_reloaded_after_max_age(self):
+        catalog.categories()
+        # A rename that never reached this process's cache
+        Category.objects.filter(id=self.academic.id).update(name='Sciences')
+        self.assertEqual(catalog.category(self.academic.id)['name'], 'Academic')
+        with self.settings(CATALOG_LOCAL_MAX_AGE=0), self.assertNumQueries(1):
+            self.assertEqual(catalog.category(self.academic.id)['name'], 'Sciences')
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='pass12345')
+        category = Category.objects.create(name='Academic')
+        subcategory = Subcategory.objects.create(name='Physics', category=category)
+        quiz = Quiz.objects.create(title='Physics', difficulty='easy', subcategory=subcategory)
+        started_at = timezone.now()
+        # Ties on started_at are broken by id.
+        QuizAttempt.objects.bulk_create([
+            QuizAttempt(user=self.user, quiz=quiz, started_at=started_at - timedelta(minutes=i // 2))
+            for i in range(7)
+        ])
+        self.client.force_login(self.user)
+
+    def test_pages_walk_every_row_once(self):
+        queryset = QuizAttempt.objects.filter(user=self.user)
+        seen, cursor = [], None
+        while True:
+            rows, cursor = pagination.page(queryset, 'started_at', cursor, size=3)
+            seen.extend(row.id for row in rows)
+            if not cursor:
+                break
+        expected = list(queryset.order_by('-started_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    @override_settings(LIST_PAGE_SIZE=5)
+    def test_history_feed_returns_next_page_as_json(self):
+        response = self.client.get(reverse('quiz:history'))
+        self.assertEqual(len(response.context['attempts']), 5)
+        cursor = response.context['next_cursor']
+        response = self.client.get(
+            reverse('quiz:history'), {'cursor': cursor}, HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        data = response.json()
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual(data['html'].count('<tr'), 2)
+
+
+class AuthSessionTests(TestCase):
+    def test_legacy_sessions_stay_logged_in(self):
+        user = User.objects.create_user(username='student', password='pass12345')
+        self.client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('quiz:history'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.session['_auth_user_backend'], 'accounts.backends.ProfileBackend')
+
+    def test_database_sessions_survive_switch_to_signed_cookies(self):
+        user = User.objects.create_user(username='student', password='pass12345')
+        self.client.force_login(user)
+        with override_settings(SESSION_ENGINE='accounts.sessions'):
+            response = self.client.get(reverse('quiz:history'))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(':', response.cookies['sessionid'].value)
+            self.assertEqual(self.client.get(reverse('quiz:history')).status_code, 200)
+
+    def test_switched_database_session_is_revoked(self):
+        from django.contrib.sessions.models import Session
+        user = User.objects.create_user(username='student', password='pass12345')
+        self.client.force_login(user)
+        legacy_key = self.client.cookies['sessionid'].value
+        with override_settings(SESSION_ENGINE='accounts.sessions'):
+            self.client.get(reverse('quiz:history'))
+            self.assertFalse(Session.objects.filter(session_key=legacy_key).exists())
+            self.client.cookies['sessionid'] = legacy_key
+            self.assertEqual(self.client.get(reverse('quiz:history')).status_code, 302)
+
+    def test_logout_revokes_database_session(self):
+        from django.contrib.sessions.models import Session
+        user = User.objects.create_user(username='student', password='pass12345')
+        self.client.force_login(user)
+        legacy_key = self.client.cookies['sessionid'].value
+        with override_settings(SESSION_ENGINE='accounts.sessions'):
+            self.client.post(reverse('accounts:logout'))
+        self.assertFalse(Session.objects.filter(session_key=legacy_key).exists())
+
+
+class ListingQueryCountTests(TestCase):
+    def setUp(self):
+        catalog.invalidate()
+        self.admin = User.objects.create_superuser(username='admin', password='pass12345')
+        category = Category.objects.create(name='Academic')
+        self.subcategory = Subcategory.objects.create(name='Physics', category=category)
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        for _ in range(count):
+            user = User.objects.create_user(username=f'user{User.objects.count()}', password='pass12345')
+            quiz = Quiz.objects.create(title='Physics', difficulty='easy', subcategory=self.subcategory)
+            Subcategory.objects.create(name=f'Topic {quiz.id}', category=self.subcategory.category)
+            for owner in (user, self.admin):
+                QuizAttempt.objects.create(user=owner, quiz=quiz, total_questions=3)
+
+    # Session, user with profile, and the listing query itself.
+    def assertQueriesFlat(self, url_name, expected):
+        for rows in (1, 4):
+            self.add_rows(rows)
+            with self.assertNumQueries(expected):
+                self.client.get(reverse(url_name))
+
+    def test_history(self):
+        self.assertQueriesFlat('quiz:history', 3)
+
+    def test_admin_users(self):
+        self.assertQueriesFlat('quiz:admin_users', 3)
+
+    def test_admin_quizzes(self):
+        self.assertQueriesFlat('quiz:admin_quizzes', 3)
+
+    def test_admin_subcategories(self):
+        self.assertQueriesFlat('quiz:admin_subcategories', 3)
+
+    def test_admin_attempts(self):
+        self.assertQueriesFlat('quiz:admin_attempts', 3)
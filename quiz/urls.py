@@ -10,9 +10,12 @@ urlpatterns = [
     path('category/<int:category_id>/', views.category, name='category'),
     path('start/', views.start_quiz, name='start'),
     path('take/<int:attempt_id>/', views.take_quiz, name='take'),
+    path('take/<int:attempt_id>/questions/', views.question_feed, name='question_feed'),
     path('answer/<int:attempt_id>/', views.answer, name='answer'),
+    path('answer/<int:attempt_id>/batch/', views.save_answers, name='save_answers'),
     path('submit/<int:attempt_id>/', views.submit_quiz, name='submit'),
     path('results/<int:attempt_id>/', views.results, name='results'),
+    path('leaderboard/', views.leaderboard_view, name='leaderboard'),
     path('history/', views.history, name='history'),
     path('admin-panel/', views.admin_dashboard, name='admin_dashboard'),
     path('admin-panel/users/', views.admin_users, name='admin_users'),
@@ -31,4 +34,5 @@ urlpatterns = [
     path('admin-panel/attempts/', views.admin_attempts, name='admin_attempts'),
     path('admin-panel/attempts/<int:attempt_id>/', views.view_attempt, name='view_attempt'),
     path('admin-panel/attempts/<int:attempt_id>/delete/', views.delete_attempt, name='delete_attempt'),
+    path('admin-panel/generator-health/', views.generator_health, name='generator_health'),
 ]
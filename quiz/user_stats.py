@@ -0,0 +1,81 @@
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+from .models import QuizAttempt
+
+# Running per-user totals kept on UserProfile so the dashboard never has to
+# aggregate attempts. Writes are single UPDATEs with F() expressions; rebuild()
+# recomputes them from QuizAttempt after bulk deletes or drift.
+
+STAT_FIELDS = ['completed_quizzes', 'in_progress_quizzes', 'total_score', 'total_questions_answered']
+
+
+def _profiles(user_id):
+    from accounts.models import UserProfile
+    return UserProfile.objects.filter(user_id=user_id)
+
+
+def _decrement(field, by=1):
+    return Greatest(F(field) - by, 0)
+
+
+def attempt_started(user_id):
+    # Starting a quiz replaces any other in-progress attempt, so the user has
+    # exactly one afterwards.
+    return _profiles(user_id).update(in_progress_quizzes=1)
+
+
+def completion_changes(attempt):
+    return {
+        'completed_quizzes': F('completed_quizzes') + 1,
+        'in_progress_quizzes': _decrement('in_progress_quizzes'),
+        'total_score': F('total_score') + attempt.score,
+        'total_questions_answered': F('total_questions_answered') + attempt.total_questions,
+    }
+
+
+def attempt_deleted(attempt):
+    if attempt.status == 'completed':
+        changes = {
+            'completed_quizzes': _decrement('completed_quizzes'),
+            'total_score': _decrement('total_score', attempt.score),
+            'total_questions_answered': _decrement('total_questions_answered', attempt.total_questions),
+        }
+    else:
+        changes = {'in_progress_quizzes': _decrement('in_progress_quizzes')}
+    return _profiles(attempt.user_id).update(**changes)
+
+
+def users_with_attempts(attempts):
+    return list(attempts.values_list('user_id', flat=True).distinct())
+
+
+def rebuild(user_ids=None, batch_size=1000):
+    from accounts.models import UserProfile
+    completed = Q(status='completed')
+    totals = QuizAttempt.objects.values('user_id').annotate(
+        completed_quizzes=Count('id', filter=completed),
+        in_progress_quizzes=Count('id', filter=Q(status='in_progress')),
+        total_score=Sum('score', filter=completed, default=0),
+        total_questions_answered=Sum('total_questions', filter=completed, default=0),
+    )
+    profiles = UserProfile.objects.only('id', 'user_id', *STAT_FIELDS)
+    if user_ids is not None:
+        totals = totals.filter(user_id__in=user_ids)
+        profiles = profiles.filter(user_id__in=user_ids)
+    totals = {row['user_id']: row for row in totals}
+
+    changed = []
+    updated = 0
+    for profile in profiles.iterator(chunk_size=batch_size):
+        row = totals.get(profile.user_id, {})
+        values = [row.get(field, 0) for field in STAT_FIELDS]
+        if values != [getattr(profile, field) for field in STAT_FIELDS]:
+            for field, value in zip(STAT_FIELDS, values):
+                setattr(profile, field, value)
+            changed.append(profile)
+        if len(changed) >= batch_size:
+            updated += UserProfile.objects.bulk_update(changed, STAT_FIELDS)
+            changed = []
+    if changed:
+        updated += UserProfile.objects.bulk_update(changed, STAT_FIELDS)
+    return updated
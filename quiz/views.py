@@ -3,11 +3,17 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import HttpResponseForbidden, JsonResponse
-from django.utils import timezone
-from .models import Category, Subcategory, Quiz, Question, QuizAttempt, UserAnswer
+from django.db import transaction
+from django.db.models import Count
+from django.http import Http404, HttpResponseForbidden, JsonResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+from .models import Category, Subcategory, Quiz, Question, QuizAttempt, LeaderboardRollup
 from .forms import QuizSettingsForm, CategoryForm, SubcategoryForm
-from .openai_service import generate_quiz_questions
+from .single_flight import generate_quiz_questions_coalesced
+from .materialize import materialize_quiz
+from .answers import record_answers, update_progress
+from . import catalog, generation_cache, leaderboard, pagination, question_pool, resilience, rollups, scoring, snapshots, streaming, user_stats
 
 
 def is_admin(user):
@@ -15,92 +21,49 @@ def is_admin(user):
 
 
 def index(request):
-    categories = Category.objects.all()
-    return render(request, 'quiz/index.html', {'categories': categories})
+    return render(request, 'quiz/index.html', {'categories': catalog.categories()})
 
 
 @login_required
 def dashboard(request):
-    from django.db.models import Sum, Count, Q
     from accounts.models import UserProfile
-    from datetime import date, timedelta
     
-    recent_attempts = QuizAttempt.objects.filter(user=request.user).order_by('-started_at')[:5]
-    completed_attempts = QuizAttempt.objects.filter(user=request.user, status='completed')
-    incomplete_attempts = QuizAttempt.objects.filter(user=request.user, status='in_progress')
-    completed_count = completed_attempts.count()
-    incomplete_count = incomplete_attempts.count()
-    
-    total_score = 0
-    total_questions = 0
-    for attempt in completed_attempts:
-        total_score += attempt.score
-        total_questions += attempt.total_questions
-    
-    avg_score = round((total_score / total_questions * 100)) if total_questions > 0 else 0
+    recent_attempts = QuizAttempt.objects.filter(user=request.user).select_related('quiz').order_by('-started_at')[:5]
     
     profile = request.user.profile if hasattr(request.user, 'profile') else None
     if not profile:
         profile = UserProfile.objects.create(user=request.user)
+        user_stats.rebuild([request.user.id])
+        profile.refresh_from_db()
     
-    user_rankings = []
-    all_profiles = UserProfile.objects.select_related('user').filter(
-        total_points__gt=0
-    ).order_by('-total_points')[:10]
-    
-    user_rank = None
-    for idx, p in enumerate(all_profiles, 1):
-        user_attempts = QuizAttempt.objects.filter(user=p.user, status='completed')
-        user_completed = user_attempts.count()
-        
-        user_total_score = 0
-        user_total_questions = 0
-        for att in user_attempts:
-            user_total_score += att.score
-            user_total_questions += att.total_questions
-        
-        user_score_pct = round((user_total_score / user_total_questions * 100)) if user_total_questions > 0 else 0
-        
-        user_rankings.append({
-            'rank': idx,
-            'username': p.user.username,
-            'quizzes': user_completed,
-            'score_pct': user_score_pct,
-            'total_points': p.total_points,
-            'is_current_user': p.user.id == request.user.id
-        })
-        if p.user.id == request.user.id:
-            user_rank = idx
-    
-    if user_rank is None and profile.total_points > 0:
-        all_profiles_list = list(UserProfile.objects.filter(total_points__gt=0).order_by('-total_points'))
-        for idx, p in enumerate(all_profiles_list, 1):
-            if p.user_id == request.user.id:
-                user_rank = idx
-                break
+    rankings = leaderboard.snapshot()
+    user_rank = leaderboard.user_standing(profile, rankings)
+    for player in rankings:
+        player['is_current_user'] = player['user_id'] == request.user.id
     
     return render(request, 'quiz/dashboard.html', {
         'recent_attempts': recent_attempts,
-        'completed_count': completed_count,
-        'incomplete_count': incomplete_count,
-        'avg_score': avg_score,
+        'completed_count': profile.completed_quizzes,
+        'incomplete_count': profile.in_progress_quizzes,
+        'avg_score': profile.average_score(),
         'current_streak': profile.current_streak,
         'longest_streak': profile.longest_streak,
         'total_points': profile.total_points,
-        'user_rank': user_rank or 'N/A',
-        'rankings': user_rankings,
+        'user_rank': user_rank,
+        'rankings': rankings,
     })
 
 
 @login_required
 def browse(request):
-    categories = Category.objects.all()
-    return render(request, 'quiz/browse.html', {'categories': categories})
+    return render(request, 'quiz/browse.html', {'categories': catalog.categories()})
 
 
 @login_required
 def category(request, category_id):
-    cat = get_object_or_404(Category, id=category_id)
+    cat = catalog.category(category_id)
+    if cat is None:
+        raise Http404('No Category matches the given query.')
     return render(request, 'quiz/category.html', {'category': cat})
 
 
@@ -113,46 +76,18 @@ def start_quiz(request):
             difficulty = form.cleaned_data['difficulty']
             num_questions = int(form.cleaned_data['num_questions'])
             
-            # Clean up any abandoned "in_progress" attempts for this user
-            QuizAttempt.objects.filter(
-                user=request.user, 
-                status='in_progress'
-            ).delete()
-            
-            questions = generate_quiz_questions(subcategory.name, difficulty, num_questions)
-            
-            if not questions:
+            attempt = None
+            if question_pool.pool_enabled():
+                attempt = question_pool.start_pooled_quiz(request.user, subcategory, difficulty, num_questions)
+            if not attempt and streaming.streaming_enabled():
+                attempt = streaming.start_streamed_quiz(request.user, subcategory, difficulty, num_questions)
+            if not attempt:
+                questions = generate_quiz_questions_coalesced(subcategory.name, difficulty, num_questions)
+                attempt = materialize_quiz(request.user, subcategory, difficulty, questions)
+            if not attempt:
                 messages.error(request, 'Unable to generate quiz questions. Please try again.')
                 return render(request, 'quiz/start.html', {'form': form})
             
-            quiz = Quiz.objects.create(
-                title=f"{subcategory.name} Quiz - {difficulty.capitalize()}",
-                difficulty=difficulty,
-                subcategory=subcategory,
-                time_limit=len(questions) * 60
-            )
-            
-            for i, q in enumerate(questions):
-                Question.objects.create(
-                    quiz=quiz,
-                    question_text=q['question'],
-                    option_a=q['option_a'],
-                    option_b=q['option_b'],
-                    option_c=q['option_c'],
-                    option_d=q['option_d'],
-                    correct_answer=q['correct_answer'],
-                    explanation=q.get('explanation', ''),
-                    order=i
-                )
-            
-            attempt = QuizAttempt.objects.create(
-                user=request.user,
-                quiz=quiz,
-                total_questions=len(questions),
-                time_remaining=quiz.time_limit,
-                status='in_progress'
-            )
-            
             return redirect('quiz:take', attempt_id=attempt.id)
     else:
         form = QuizSettingsForm()
@@ -177,6 +112,11 @@ def take_quiz(request, attempt_id):
     if attempt.status == 'completed':
         return redirect('quiz:results', attempt_id=attempt.id)
     
+    if scoring.is_expired(attempt):
+        scoring.complete_attempt(attempt)
+        messages.info(request, "Time's up! Your quiz has been submitted.")
+        return redirect('quiz:results', attempt_id=attempt.id)
+    
     questions = Question.objects.filter(quiz=attempt.quiz).order_by('order')
     answered = {str(ua.question_id): ua.selected_answer for ua in attempt.answers.all()}
     answered_json = json.dumps(answered)
@@ -186,69 +126,125 @@ def take_quiz(request, attempt_id):
         'questions': questions,
         'answered': answered,
         'answered_json': answered_json,
+        'seconds_remaining': attempt.seconds_remaining(),
     })
 
 
 @login_required
-def answer(request, attempt_id):
-    attempt = get_object_or_404(QuizAttempt, id=attempt_id)
+def question_feed(request, attempt_id):
+    attempt = get_object_or_404(QuizAttempt.objects.select_related('quiz'), id=attempt_id)
     
-    if attempt.user != request.user:
+    if attempt.user_id != request.user.id:
         return HttpResponseForbidden('Access denied')
     
+    streaming.finalize_if_stale(attempt)
+    
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        after = 0
+    
+    questions = Question.objects.filter(quiz=attempt.quiz, order__gte=after).order_by('order').values(
+        'id', 'order', 'question_text', 'option_a', 'option_b', 'option_c', 'option_d'
+    )
+    
+    return JsonResponse({
+        'questions': list(questions),
+        'generating': attempt.quiz.is_generating,
+        'total': attempt.total_questions,
+        'seconds_remaining': attempt.seconds_remaining(),
+    })
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rejected_answer(request, attempt_id, is_ajax):
+    # Slow path, only taken when the guarded writes matched nothing: look the
+    # attempt up to report why.
+    attempt = get_object_or_404(QuizAttempt.objects.select_related('quiz'), id=attempt_id)
+    if attempt.user_id != request.user.id:
+        return HttpResponseForbidden('Access denied')
+    if scoring.is_expired(attempt):
+        scoring.complete_attempt(attempt)
     if attempt.status == 'completed':
-        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        if is_ajax:
             return JsonResponse({'status': 'completed'})
         return redirect('quiz:results', attempt_id=attempt.id)
-    
-    if request.method == 'POST':
-        question_id = request.POST.get('question_id')
-        selected_answer = request.POST.get('answer')
-        current_q = request.POST.get('current_question', 0)
-        time_remaining = request.POST.get('time_remaining')
-        
-        if question_id and selected_answer:
-            try:
-                question = Question.objects.get(id=question_id, quiz=attempt.quiz)
-                user_answer, created = UserAnswer.objects.update_or_create(
-                    attempt=attempt,
-                    question=question,
-                    defaults={
-                        'selected_answer': selected_answer,
-                        'is_correct': selected_answer == question.correct_answer
-                    }
-                )
-            except Question.DoesNotExist:
-                if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                    return JsonResponse({'error': 'Invalid question'}, status=400)
-                return HttpResponseForbidden('Invalid question')
-        
-        # Re-fetch the attempt to check if it was completed by another request (race condition fix)
-        attempt.refresh_from_db()
-        if attempt.status == 'completed':
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({'status': 'completed'})
-            return redirect('quiz:results', attempt_id=attempt.id)
-        
-        attempt.current_question = int(current_q) if current_q else 0
-        if time_remaining:
-            try:
-                attempt.time_remaining = int(time_remaining)
-            except (ValueError, TypeError):
-                pass
-        attempt.save()
-        
-        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            return JsonResponse({'status': 'saved'})
-    
-    return redirect('quiz:take', attempt_id=attempt.id)
+    if is_ajax:
+        return JsonResponse({'error': 'Invalid question'}, status=400)
+    return HttpResponseForbidden('Invalid question')
+
+
+@login_required
+def answer(request, attempt_id):
+    if request.method != 'POST':
+        return redirect('quiz:take', attempt_id=attempt_id)
+    
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    question_id = request.POST.get('question_id')
+    selected_answer = request.POST.get('answer')
+    
+    # The version bump goes first and shares a transaction with the answer,
+    # so a concurrent submit either sees both or has to rescore.
+    with transaction.atomic():
+        saved = update_progress(
+            attempt_id,
+            request.user.id,
+            current_question=_int_or_none(request.POST.get('current_question')) or 0,
+        )
+        if saved and question_id and selected_answer:
+            saved = record_answers(attempt_id, request.user.id, {question_id: selected_answer})
+            if not saved:
+                transaction.set_rollback(True)
+    if not saved:
+        return _rejected_answer(request, attempt_id, is_ajax)
+    
+    if is_ajax:
+        return JsonResponse({'status': 'saved'})
+    return redirect('quiz:take', attempt_id=attempt_id)
+
+
+@login_required
+def save_answers(request, attempt_id):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    
+    try:
+        payload = json.loads(request.body)
+        if not isinstance(payload, dict):
+            raise ValueError('payload must be an object')
+        current_question = payload.get('current_question')
+        current_question = int(current_question) if current_question is not None else None
+        answers = payload.get('answers', {})
+        if not isinstance(answers, dict):
+            raise ValueError('answers must be an object')
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'Invalid payload'}, status=400)
+    
+    with transaction.atomic():
+        updated = update_progress(attempt_id, request.user.id, current_question)
+        saved = record_answers(attempt_id, request.user.id, answers) if updated else 0
+    
+    if not updated:
+        attempt = get_object_or_404(QuizAttempt.objects.select_related('quiz'), id=attempt_id)
+        if attempt.user_id != request.user.id:
+            return JsonResponse({'error': 'Access denied'}, status=403)
+        if scoring.is_expired(attempt):
+            scoring.complete_attempt(attempt)
+        return JsonResponse({'status': 'completed'})
+    return JsonResponse({'status': 'saved', 'saved': saved})
 
 
 @login_required
 def submit_quiz(request, attempt_id):
-    attempt = get_object_or_404(QuizAttempt, id=attempt_id)
+    attempt = get_object_or_404(QuizAttempt.objects.select_related('quiz__subcategory'), id=attempt_id)
     
-    if attempt.user != request.user:
+    if attempt.user_id != request.user.id:
         messages.error(request, 'Access denied.')
         return redirect('quiz:dashboard')
     
@@ -260,110 +256,85 @@ def submit_quiz(request, attempt_id):
         selected_answer = request.POST.get('answer')
         
         if question_id and selected_answer:
-            try:
-                question = Question.objects.get(id=question_id, quiz=attempt.quiz)
-                UserAnswer.objects.update_or_create(
-                    attempt=attempt,
-                    question=question,
-                    defaults={
-                        'selected_answer': selected_answer,
-                        'is_correct': selected_answer == question.correct_answer
-                    }
-                )
-            except Question.DoesNotExist:
-                pass
-        
-        correct_count = UserAnswer.objects.filter(attempt=attempt, is_correct=True).count()
-        
-        attempt.score = correct_count
-        attempt.status = 'completed'
-        attempt.completed_at = timezone.now()
-        attempt.save()
+            record_answers(attempt.id, request.user.id, {question_id: selected_answer})
+            attempt.refresh_from_db(fields=['status', 'version'])
         
-        from accounts.models import UserProfile
-        from datetime import date
-        profile, created = UserProfile.objects.get_or_create(user=request.user)
-        today = date.today()
-        
-        if attempt.quiz.difficulty == 'easy':
-            points_per_correct = 10
-        elif attempt.quiz.difficulty == 'medium':
-            points_per_correct = 15
-        else:
-            points_per_correct = 20
-        points_earned = correct_count * points_per_correct
-        profile.total_points += points_earned
-        
-        if profile.last_quiz_date:
-            days_diff = (today - profile.last_quiz_date).days
-            if days_diff == 0:
-                pass
-            elif days_diff == 1:
-                profile.current_streak += 1
-            else:
-                profile.current_streak = 1
-        else:
-            profile.current_streak = 1
-        
-        if profile.current_streak > profile.longest_streak:
-            profile.longest_streak = profile.current_streak
-        
-        profile.last_quiz_date = today
-        profile.save()
+        if not scoring.complete_attempt(attempt) and attempt.status != 'completed':
+            messages.error(request, 'Your answers are still being saved. Please submit again.')
+            return redirect('quiz:take', attempt_id=attempt.id)
     
     return redirect('quiz:results', attempt_id=attempt.id)
 
 
 @login_required
 def results(request, attempt_id):
-    attempt = get_object_or_404(QuizAttempt, id=attempt_id)
+    attempt = get_object_or_404(QuizAttempt.objects.select_related('quiz'), id=attempt_id)
     
-    if attempt.user != request.user and not is_admin(request.user):
+    if attempt.user_id != request.user.id and not is_admin(request.user):
         messages.error(request, 'Access denied.')
         return redirect('quiz:dashboard')
     
-    questions = Question.objects.filter(quiz=attempt.quiz).order_by('order')
-    user_answers = {ua.question_id: ua for ua in attempt.answers.all()}
-    
-    results_data = []
-    for q in questions:
-        ua = user_answers.get(q.id)
-        results_data.append({
-            'question': q,
-            'user_answer': ua.selected_answer if ua else None,
-            'is_correct': ua.is_correct if ua else False,
-            'explanation': q.explanation
-        })
-    
-    percentage = round((attempt.score / attempt.total_questions) * 100) if attempt.total_questions > 0 else 0
-    
-    time_taken = "N/A"
-    if attempt.completed_at and attempt.started_at:
-        duration = attempt.completed_at - attempt.started_at
-        total_seconds = int(duration.total_seconds())
-        minutes = total_seconds // 60
-        seconds = total_seconds % 60
-        time_taken = f"{minutes}m {seconds}s"
+    snapshot = snapshots.for_attempt(attempt)
     
     return render(request, 'quiz/results.html', {
         'attempt': attempt,
-        'results_data': results_data,
-        'percentage': percentage,
-        'time_taken': time_taken,
+        'snapshot': snapshot,
+        'results_data': snapshot['items'],
+        'percentage': snapshot['percentage'],
+        'time_taken': snapshots.time_taken(snapshot),
     })
 
 
+@login_required
+def leaderboard_view(request):
+    period = request.GET.get('period', 'week')
+    if period not in rollups.PERIODS:
+        period = 'week'
+    category_id = request.GET.get('category')
+    selected_category = catalog.category(int(category_id)) if category_id and category_id.isdigit() else None
+    category_id = selected_category['id'] if selected_category else None
+    
+    players = rollups.top(period, category_id, limit=leaderboard.size())
+    for player in players:
+        player['is_current_user'] = player['user_id'] == request.user.id
+    
+    return render(request, 'quiz/leaderboard.html', {
+        'players': players,
+        'standing': rollups.standing(period, request.user.id, category_id),
+        'period': period,
+        'periods': LeaderboardRollup.PERIOD_CHOICES,
+        'categories': sorted(catalog.categories(), key=lambda c: c['name']),
+        'selected_category': selected_category,
+    })
+
+
+def _listing(request, queryset, field, template, rows_template, name):
+    # Full page on a normal request; the next page of rows plus its cursor as
+    # JSON when the listing's "Load more" script asks for it.
+    rows, next_cursor = pagination.page(queryset, field, request.GET.get('cursor'))
+    context = {name: rows, 'next_cursor': next_cursor}
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        response = JsonResponse({
+            'html': render_to_string(rows_template, context, request=request),
+            'next_cursor': next_cursor,
+        })
+    else:
+        response = render(request, template, context)
+    patch_vary_headers(response, ['X-Requested-With'])
+    return response
+
+
 @login_required
 def history(request):
-    attempts = QuizAttempt.objects.filter(user=request.user).order_by('-started_at')
-    return render(request, 'quiz/history.html', {'attempts': attempts})
+    attempts = QuizAttempt.objects.filter(user=request.user).select_related('quiz__subcategory__category')
+    return _listing(request, attempts, 'started_at', 'quiz/history.html', 'quiz/history_rows.html', 'attempts')
 
 
 @login_required
 @user_passes_test(is_admin)
 def admin_dashboard(request):
     total_users = User.objects.count()
-    total_categories = Category.objects.count()
+    total_categories = len(catalog.categories())
     total_quizzes = Quiz.objects.count()
     total_attempts = QuizAttempt.objects.filter(status='completed').count()
     recent_users = User.objects.order_by('-date_joined')[:5]
@@ -380,8 +351,7 @@ def admin_dashboard(request):
 @login_required
 @user_passes_test(is_admin)
 def admin_users(request):
-    users = User.objects.order_by('-date_joined')
-    return render(request, 'quiz/admin/users.html', {'users': users})
+    return _listing(request, User.objects.select_related('profile'), 'date_joined', 'quiz/admin/users.html', 'quiz/admin/user_rows.html', 'users')
 
 
 @login_required
@@ -426,7 +396,7 @@ def edit_user(request, user_id):
 @login_required
 @user_passes_test(is_admin)
 def admin_categories(request):
-    categories = Category.objects.all()
+    categories = catalog.categories()
     return render(request, 'quiz/admin/categories.html', {'categories': categories})
 
 
@@ -464,7 +434,9 @@ def edit_category(request, category_id):
 def delete_category(request, category_id):
     if request.method == 'POST':
         cat = get_object_or_404(Category, id=category_id)
+        user_ids = user_stats.users_with_attempts(QuizAttempt.objects.filter(quiz__subcategory__category=cat))
         cat.delete()
+        user_stats.rebuild(user_ids)
         messages.success(request, 'Category deleted.')
     return redirect('quiz:admin_categories')
 
@@ -472,7 +444,7 @@ def delete_category(request, category_id):
 @login_required
 @user_passes_test(is_admin)
 def admin_subcategories(request):
-    subcategories = Subcategory.objects.select_related('category').order_by('category__name', 'name')
+    subcategories = Subcategory.objects.select_related('category').annotate(quiz_count=Count('quizzes')).order_by('category__name', 'name')
     return render(request, 'quiz/admin/subcategories.html', {'subcategories': subcategories})
 
 
@@ -510,7 +482,9 @@ def edit_subcategory(request, subcategory_id):
 def delete_subcategory(request, subcategory_id):
     if request.method == 'POST':
         sub = get_object_or_404(Subcategory, id=subcategory_id)
+        user_ids = user_stats.users_with_attempts(QuizAttempt.objects.filter(quiz__subcategory=sub))
         sub.delete()
+        user_stats.rebuild(user_ids)
         messages.success(request, 'Subcategory deleted.')
     return redirect('quiz:admin_subcategories')
 
@@ -518,8 +492,8 @@ def delete_subcategory(request, subcategory_id):
 @login_required
 @user_passes_test(is_admin)
 def admin_quizzes(request):
-    quizzes = Quiz.objects.select_related('subcategory', 'subcategory__category').order_by('-created_at')
-    return render(request, 'quiz/admin/quizzes.html', {'quizzes': quizzes})
+    quizzes = Quiz.objects.select_related('subcategory__category').annotate(question_count=Count('questions'))
+    return _listing(request, quizzes, 'created_at', 'quiz/admin/quizzes.html', 'quiz/admin/quiz_rows.html', 'quizzes')
 
 
 @login_required
@@ -527,7 +501,9 @@ def admin_quizzes(request):
 def delete_quiz(request, quiz_id):
     if request.method == 'POST':
         quiz = get_object_or_404(Quiz, id=quiz_id)
+        user_ids = user_stats.users_with_attempts(quiz.attempts.all())
         quiz.delete()
+        user_stats.rebuild(user_ids)
         messages.success(request, 'Quiz deleted successfully.')
     return redirect('quiz:admin_quizzes')
 
@@ -535,33 +511,21 @@ def delete_quiz(request, quiz_id):
 @login_required
 @user_passes_test(is_admin)
 def admin_attempts(request):
-    attempts = QuizAttempt.objects.select_related('user', 'quiz', 'quiz__subcategory').order_by('-started_at')
-    return render(request, 'quiz/admin/attempts.html', {'attempts': attempts})
+    attempts = QuizAttempt.objects.select_related('user__profile', 'quiz__subcategory')
+    return _listing(request, attempts, 'started_at', 'quiz/admin/attempts.html', 'quiz/admin/attempt_rows.html', 'attempts')
 
 
 @login_required
 @user_passes_test(is_admin)
 def view_attempt(request, attempt_id):
-    attempt = get_object_or_404(QuizAttempt, id=attempt_id)
-    questions = Question.objects.filter(quiz=attempt.quiz).order_by('order')
-    user_answers = {ua.question_id: ua for ua in attempt.answers.all()}
-    
-    results_data = []
-    for q in questions:
-        ua = user_answers.get(q.id)
-        results_data.append({
-            'question': q,
-            'user_answer': ua.selected_answer if ua else None,
-            'is_correct': ua.is_correct if ua else False,
-            'explanation': q.explanation
-        })
-    
-    percentage = round((attempt.score / attempt.total_questions) * 100) if attempt.total_questions > 0 else 0
+    attempt = get_object_or_404(QuizAttempt.objects.select_related('user__profile', 'quiz__subcategory__category'), id=attempt_id)
+    snapshot = snapshots.for_attempt(attempt)
     
     return render(request, 'quiz/admin/attempt_detail.html', {
         'attempt': attempt,
-        'results_data': results_data,
-        'percentage': percentage,
+        'snapshot': snapshot,
+        'results_data': snapshot['items'],
+        'percentage': snapshot['percentage'],
     })
 
 
@@ -575,4 +539,13 @@ def delete_attempt(request, attempt_id):
         else:
             messages.success(request, 'Attempt deleted successfully.')
         attempt.delete()
+        user_stats.attempt_deleted(attempt)
     return redirect('quiz:admin_attempts')
+
+
+@login_required
+@user_passes_test(is_admin)
+def generator_health(request):
+    health = resilience.health()
+    health['cache'] = generation_cache.stats()
+    return JsonResponse(health)
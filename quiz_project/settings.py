@@ -1,4 +1,5 @@
 import os
+from django.core.exceptions import ImproperlyConfigured
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -42,6 +43,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'accounts.middleware.upgrade_session_backend',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -49,6 +51,10 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'quiz_project.urls'
 
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileBackend',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -103,6 +109,35 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # LocMemCache evicts least-recently-used entries once MAX_ENTRIES is reached.
+    # Set QUIZ_GENERATION_CACHE_DIR to keep responses on local disk instead.
+    'quiz_generation': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'quiz-generation',
+        'TIMEOUT': int(os.environ.get('QUIZ_GENERATION_CACHE_TTL', 86400)),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('QUIZ_GENERATION_CACHE_MAX_ENTRIES', 1000))},
+    },
+}
+
+if os.environ.get('QUIZ_GENERATION_CACHE_DIR'):
+    CACHES['quiz_generation'].update({
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['QUIZ_GENERATION_CACHE_DIR'],
+    })
+
+# The default cache carries the catalog version, leaderboard snapshots and the points histogram,
+# which every worker must see. Set CACHE_URL to a Redis URL whenever more than one process serves
+# requests; the per-process LocMemCache fallback is only correct for a single-process dev server.
+if os.environ.get('CACHE_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CACHE_URL'],
+    }
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = 'accounts:login'
@@ -110,3 +145,91 @@ LOGIN_REDIRECT_URL = 'quiz:dashboard'
 LOGOUT_REDIRECT_URL = 'quiz:index'
 
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+
+# Pre-generated question pool, kept between the watermarks by `manage.py refill_question_pool`
+QUESTION_POOL_ENABLED = os.environ.get('QUESTION_POOL_ENABLED', 'true').lower() == 'true'
+QUESTION_POOL_LOW_WATERMARK = int(os.environ.get('QUESTION_POOL_LOW_WATERMARK', 20))
+QUESTION_POOL_HIGH_WATERMARK = int(os.environ.get('QUESTION_POOL_HIGH_WATERMARK', 60))
+
+# Identical concurrent generation requests share one call via quiz.single_flight
+SINGLE_FLIGHT_ENABLED = os.environ.get('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+SINGLE_FLIGHT_LEASE = int(os.environ.get('SINGLE_FLIGHT_LEASE', 60))
+SINGLE_FLIGHT_WAIT_TIMEOUT = int(os.environ.get('SINGLE_FLIGHT_WAIT_TIMEOUT', 90))
+SINGLE_FLIGHT_RESULT_TTL = int(os.environ.get('SINGLE_FLIGHT_RESULT_TTL', 5))
+
+# Stream questions from the generator and open the quiz once the first one is saved
+QUIZ_STREAMING_GENERATION = os.environ.get('QUIZ_STREAMING_GENERATION', 'false').lower() == 'true'
+# Seconds after which a quiz still marked as generating is closed with the questions saved so far
+QUIZ_STREAMING_STALE_SECONDS = int(os.environ.get('QUIZ_STREAMING_STALE_SECONDS', 120))
+
+# Large quizzes are generated as concurrent chunks of this many questions (0 disables)
+QUIZ_GENERATION_CHUNK_SIZE = int(os.environ.get('QUIZ_GENERATION_CHUNK_SIZE', 5))
+QUIZ_GENERATION_MAX_CONCURRENCY = int(os.environ.get('QUIZ_GENERATION_MAX_CONCURRENCY', 4))
+
+# Generator responses are cached by hash of model + prompt + config (see quiz.generation_cache)
+QUIZ_GENERATION_CACHE_ENABLED = os.environ.get('QUIZ_GENERATION_CACHE_ENABLED', 'true').lower() == 'true'
+QUIZ_GENERATION_CACHE_TTL = int(os.environ.get('QUIZ_GENERATION_CACHE_TTL', 86400))
+QUIZ_GENERATION_CACHE_OVERSAMPLE = float(os.environ.get('QUIZ_GENERATION_CACHE_OVERSAMPLE', 1.5))
+
+# Question generator backend: GeminiGenerator, LocalCorpusGenerator or HttpStubGenerator (quiz.generator_backends)
+QUIZ_GENERATOR_BACKEND = os.environ.get('QUIZ_GENERATOR_BACKEND', 'quiz.generator_backends.GeminiGenerator')
+QUIZ_LOCAL_CORPUS_PATH = os.environ.get('QUIZ_LOCAL_CORPUS_PATH')
+QUIZ_GENERATOR_STUB_URL = os.environ.get('QUIZ_GENERATOR_STUB_URL', 'http://127.0.0.1:8765/')
+
+# Deadline, circuit breaker and hedging around generator calls (see quiz.resilience)
+QUIZ_GENERATOR_DEADLINE = float(os.environ.get('QUIZ_GENERATOR_DEADLINE', 20))
+QUIZ_GENERATOR_MAX_INFLIGHT = int(os.environ.get('QUIZ_GENERATOR_MAX_INFLIGHT', 16))
+QUIZ_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('QUIZ_BREAKER_FAILURE_THRESHOLD', 5))
+QUIZ_BREAKER_SLOW_CALL_SECONDS = float(os.environ.get('QUIZ_BREAKER_SLOW_CALL_SECONDS', 15))
+QUIZ_BREAKER_RESET_TIMEOUT = float(os.environ.get('QUIZ_BREAKER_RESET_TIMEOUT', 30))
+QUIZ_GENERATOR_HEDGING = os.environ.get('QUIZ_GENERATOR_HEDGING', 'false').lower() == 'true'
+QUIZ_GENERATOR_HEDGE_MIN_SAMPLES = int(os.environ.get('QUIZ_GENERATOR_HEDGE_MIN_SAMPLES', 20))
+
+# Quiz deadlines are stored as QuizAttempt.expires_at; answers are accepted this long after it (see quiz.scoring)
+QUIZ_TIMER_GRACE_SECONDS = int(os.environ.get('QUIZ_TIMER_GRACE_SECONDS', 5))
+
+# Leaderboard snapshot size and cache lifetime (see quiz.leaderboard)
+LEADERBOARD_SIZE = int(os.environ.get('LEADERBOARD_SIZE', 10))
+LEADERBOARD_CACHE_TTL = int(os.environ.get('LEADERBOARD_CACHE_TTL', 30))
+# Per-process Fenwick tree for "your rank" lookups, rebuilt from the DB every RECONCILE seconds (see quiz.rank_index)
+LEADERBOARD_RANK_INDEX = os.environ.get('LEADERBOARD_RANK_INDEX', 'false').lower() == 'true'
+LEADERBOARD_RANK_INDEX_RECONCILE = int(os.environ.get('LEADERBOARD_RANK_INDEX_RECONCILE', 300))
+# Outside the top N, show "Top x%" from an equi-depth histogram in the default cache, rebuilt lazily or by
+# `manage.py refresh_points_histogram` when CACHE_URL makes that cache shared (see quiz.percentiles)
+LEADERBOARD_PERCENTILE_RANKS = os.environ.get('LEADERBOARD_PERCENTILE_RANKS', 'true').lower() == 'true'
+LEADERBOARD_HISTOGRAM_RESOLUTION = int(os.environ.get('LEADERBOARD_HISTOGRAM_RESOLUTION', 1000))
+LEADERBOARD_HISTOGRAM_REFRESH = int(os.environ.get('LEADERBOARD_HISTOGRAM_REFRESH', 300))
+
+# Seconds a process serves its own copy of the category tree before checking the shared catalog version (see quiz.catalog)
+CATALOG_LOCAL_TTL = int(os.environ.get('CATALOG_LOCAL_TTL', 5))
+# Seconds before a process reloads the tree from the database even if the version has not moved
+CATALOG_LOCAL_MAX_AGE = int(os.environ.get('CATALOG_LOCAL_MAX_AGE', 300))
+
+# Rows per page on the keyset-paginated history and admin listings (see quiz.pagination)
+LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', 50))
+
+# Session storage: 'db', 'cached_db' (the table behind a shared cache at SESSION_CACHE_URL) or
+# 'signed_cookies' (no server-side storage, see accounts.sessions). Existing database sessions
+# remain valid after switching to either of the other two.
+SESSION_STORE = os.environ.get('SESSION_STORE', 'db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'accounts.sessions',
+}[SESSION_STORE]
+SESSION_CACHE_ALIAS = 'sessions'
+CACHES['sessions'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'sessions',
+}
+if os.environ.get('SESSION_CACHE_URL'):
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['SESSION_CACHE_URL'],
+    }
+elif SESSION_STORE == 'cached_db':
+    # A per-process cache would keep serving sessions other workers have changed or logged out.
+    raise ImproperlyConfigured('SESSION_STORE=cached_db needs a shared cache; set SESSION_CACHE_URL.')
+
+# Seconds a password reset link stays valid; links are signed, not stored (see accounts.views)
+PASSWORD_RESET_TIMEOUT = int(os.environ.get('PASSWORD_RESET_TIMEOUT', 3600))